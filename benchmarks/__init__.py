@@ -0,0 +1 @@
+# LDCM Benchmarks
@@ -0,0 +1,54 @@
+"""
+Per-command latency with and without the key agent
+
+Simulates what each CLI invocation pays before it can decrypt: a fresh
+VaultManager plus either a full password unlock or an agent handshake.
+"""
+import os
+import tempfile
+import threading
+from benchmarks.common import PASSWORD, temp_vault, timed, report
+from src.agent import AgentClient, AgentCrypto, KeyAgent
+from src.vault import VaultManager
+
+SECRETS = 20
+
+
+def main():
+    with temp_vault() as vault:
+        vault.create_project("bench")
+        project = vault.get_projects()[0]
+        env = vault.get_environments(project.id)[0]
+        for i in range(SECRETS):
+            vault.add_secret(env.id, f"KEY_{i}", f"value-{i}")
+        db_path = vault.db.db_path
+        
+        def run_command(unlock):
+            cli_vault = VaultManager(db_path)
+            unlock(cli_vault)
+            for s in cli_vault.get_secrets(env.id):
+                cli_vault.decrypt_secret(s)
+            cli_vault.lock()
+            cli_vault.db.engine.dispose()
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, "agent.sock")
+            agent = KeyAgent(vault, socket_path)
+            thread = threading.Thread(target=agent.serve, daemon=True)
+            thread.start()
+            client = AgentClient(socket_path)
+            while not client.is_running():
+                pass
+            
+            print(f"Per-command latency ({SECRETS} secrets decrypted):")
+            report("password unlock", timed(lambda: run_command(lambda v: v.unlock(PASSWORD))))
+            report("key agent", timed(
+                lambda: run_command(lambda v: v.unlock_with(AgentCrypto(AgentClient(socket_path))))
+            ))
+            
+            client.call("lock")
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
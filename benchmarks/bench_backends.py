@@ -0,0 +1,61 @@
+"""
+Cross-backend compatibility check and AES-GCM throughput per backend
+"""
+import os
+import time
+from src.crypto import BACKENDS, get_backend
+
+SIZES = {"32 B": 32, "64 KiB": 64 * 1024}
+DURATION = 1.0
+
+
+def available_backends() -> list:
+    backends = []
+    for name in BACKENDS:
+        try:
+            get_backend(name).cipher(os.urandom(32))
+            backends.append(get_backend(name))
+        except ImportError:
+            print(f"  {name}: not installed, skipped")
+    return backends
+
+
+def check_compatibility(backends: list, key: bytes):
+    """Every backend must decrypt what every other backend encrypts"""
+    for writer in backends:
+        for reader in backends:
+            for size in (0, 1, *SIZES.values()):
+                plaintext = os.urandom(size)
+                sealed = writer.cipher(key).encrypt(plaintext)
+                assert len(sealed) == size + 28, f"{writer.name}: unexpected ciphertext length"
+                assert reader.cipher(key).decrypt(sealed) == plaintext, f"{writer.name} -> {reader.name}"
+    print(f"  compatible: {', '.join(b.name for b in backends)}")
+
+
+def throughput(fn, size: int) -> float:
+    """MiB/s of fn() over DURATION seconds"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        fn()
+        count += 1
+    return count * size / (time.perf_counter() - start) / (1024 * 1024)
+
+
+def main():
+    key = os.urandom(32)
+    backends = available_backends()
+    check_compatibility(backends, key)
+    for label, size in SIZES.items():
+        print(f"{label} secrets:")
+        plaintext = os.urandom(size)
+        for backend in backends:
+            cipher = backend.cipher(key)
+            sealed = cipher.encrypt(plaintext)
+            enc = throughput(lambda: cipher.encrypt(plaintext), size)
+            dec = throughput(lambda: cipher.decrypt(sealed), size)
+            print(f"  {backend.name:<14} encrypt {enc:10.1f} MiB/s   decrypt {dec:10.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+N reader processes against one writer: default SQLite settings vs the tuned engine
+"""
+import multiprocessing
+import os
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from benchmarks.common import temp_vault
+from src.database import Database, Secret
+
+READERS = 4
+DURATION = 3.0
+SECRETS = 500
+
+# What create_engine() gave us before the connection-configuration layer
+DEFAULT_PRAGMAS = {name: None for name in ("journal_mode", "busy_timeout", "synchronous", "mmap_size", "cache_size")}
+
+
+def reader(db_path, pragmas, env_id, deadline, results):
+    db = Database(db_path, pragmas)
+    reads = errors = 0
+    while time.time() < deadline:
+        session = db.get_session()
+        try:
+            session.query(Secret).filter_by(environment_id=env_id).all()
+            reads += 1
+        except OperationalError:
+            errors += 1
+        finally:
+            session.close()
+    results.put(("read", reads, errors))
+
+
+def writer(db_path, pragmas, env_id, deadline, results):
+    db = Database(db_path, pragmas)
+    writes = errors = 0
+    i = 0
+    while time.time() < deadline:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text("UPDATE secrets SET encrypted_value = :v WHERE environment_id = :e AND key = :k"),
+                             {"v": os.urandom(48), "e": env_id, "k": f"KEY_{i % SECRETS}"})
+            writes += 1
+        except OperationalError:
+            errors += 1
+        i += 1
+    results.put(("write", writes, errors))
+
+
+def run(db_path, pragmas, env_id):
+    if pragmas is DEFAULT_PRAGMAS:
+        # journal_mode is stored in the file; put it back to the rollback journal
+        with Database(db_path, {"journal_mode": "DELETE"}).engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+    results = multiprocessing.Queue()
+    deadline = time.time() + DURATION
+    procs = [multiprocessing.Process(target=reader, args=(db_path, pragmas, env_id, deadline, results))
+             for _ in range(READERS)]
+    procs.append(multiprocessing.Process(target=writer, args=(db_path, pragmas, env_id, deadline, results)))
+    for p in procs:
+        p.start()
+    totals = {"read": [0, 0], "write": [0, 0]}
+    for _ in procs:
+        kind, ops, errors = results.get()
+        totals[kind][0] += ops
+        totals[kind][1] += errors
+    for p in procs:
+        p.join()
+    return totals
+
+
+def main():
+    with temp_vault() as vault:
+        vault.create_project("bench")
+        env = vault.get_environments(vault.get_projects()[0].id)[0]
+        session = vault.db.get_session()
+        session.add_all(Secret(environment_id=env.id, key=f"KEY_{i}", encrypted_value=os.urandom(48))
+                        for i in range(SECRETS))
+        session.commit()
+        session.close()
+        vault.db.engine.dispose()
+
+        print(f"{READERS} readers + 1 writer for {DURATION:.0f}s:")
+        for label, pragmas in (("default", DEFAULT_PRAGMAS), ("tuned (WAL)", None)):
+            totals = run(vault.db.db_path, pragmas, env.id)
+            print(f"  {label:<12} reads {totals['read'][0]:7d} ({totals['read'][1]} locked)   "
+                  f"writes {totals['write'][0]:6d} ({totals['write'][1]} locked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Batched parallel decryption vs the per-row decrypt loop, and the decrypt cache
+"""
+from benchmarks.common import PASSWORD, temp_vault, timed, report
+from src.database import Secret
+from src.vault import VaultManager
+
+SIZES = (100, 1000, 10000)
+
+
+def fill_environment(vault, environment_id: int, count: int):
+    env_crypto = vault._environment_crypto(environment_id)
+    session = vault.db.get_session()
+    session.add_all(
+        Secret(environment_id=environment_id, key=f"KEY_{i}",
+               encrypted_value=env_crypto.encrypt(f"value-{i}-" + "x" * 48))
+        for i in range(count)
+    )
+    session.commit()
+    session.close()
+
+
+def main():
+    with temp_vault() as vault:
+        vault.create_project("bench")
+        envs = vault.get_environments(vault.get_projects()[0].id)
+        fill_environment(vault, envs[0].id, max(SIZES))
+
+        all_secrets = vault.get_secrets(envs[0].id)
+        for size in SIZES:
+            secrets = all_secrets[:size]
+            print(f"{size} secrets:")
+            loop = timed(lambda: [vault.decrypt_secret(s) for s in secrets], repeat=3)
+            batch = timed(lambda: vault.decrypt_many(secrets), repeat=3)
+            report("decrypt_secret loop", loop)
+            report(f"decrypt_many ({batch and loop / batch:.2f}x)", batch)
+
+        cached = VaultManager(vault.db.db_path, cache_size=max(SIZES))
+        cached.unlock(PASSWORD)
+        print(f"decrypt cache, {max(SIZES)} secrets:")
+        report("cold (all misses)", timed(lambda: cached.decrypt_many(all_secrets), repeat=1))
+        report("warm (all hits)", timed(lambda: cached.decrypt_many(all_secrets), repeat=3))
+        print(f"  {cached.cache_stats()}")
+        cached.lock()
+        cached.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Whole-vault export: time and peak Python memory for `export --all` at growing vault sizes
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.common import temp_vault, report
+from src.injector import InjectionEngine
+
+SIZES = (10000, 100000)
+SECRETS_PER_ENV = 1000
+
+
+def main():
+    for rows in SIZES:
+        with temp_vault() as vault, tempfile.TemporaryDirectory() as tmp:
+            for i in range(rows // SECRETS_PER_ENV // 3):
+                for env in vault.create_project(f"project-{i}").environments:
+                    vault.import_secrets(env.id, ((f"KEY_{j}", os.urandom(16).hex()) for j in range(SECRETS_PER_ENV)))
+            
+            entries = ((p, e, k, r.value) for p, e, k, r in vault.iter_all_secrets())
+            tracemalloc.start()
+            start = time.perf_counter()
+            counts = InjectionEngine.export_all(entries, os.path.join(tmp, "export.zip"))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{counts['secrets']} secrets in {counts['environments']} environments:")
+            report("export --all to .zip", elapsed)
+            print(f"  {'peak traced memory':<40} {peak / 1024:10.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Exporting the DB_* keys of a 5000-key environment: decrypt everything and filter vs KeyFilter pushdown
+"""
+from benchmarks.common import temp_vault, timed, report
+from src.vault import KeyFilter
+
+SECRETS = 5000
+SELECTED = 50
+
+
+def main():
+    with temp_vault() as vault:
+        vault.create_project("app")
+        env = vault.resolve("app", "dev")
+        items = [(f"DB_{i}", f"value-{i}") for i in range(SELECTED)]
+        items += [(f"KEY_{i}", f"value-{i}") for i in range(SECRETS - SELECTED)]
+        vault.import_secrets(env.id, items)
+        keys = KeyFilter(prefixes=("DB_",))
+        
+        def decrypt_and_filter():
+            secrets = vault.get_secrets_by_path("app/dev")
+            results = vault.decrypt_many(secrets)
+            return {s.key: r.value for s, r in zip(secrets, results) if s.key.startswith("DB_")}
+        
+        def pushdown():
+            secrets = vault.get_secrets_by_path("app/dev", keys)
+            return {s.key: r.value for s, r in zip(secrets, vault.decrypt_many(secrets))}
+        
+        assert decrypt_and_filter() == pushdown()
+        print(f"{SELECTED} of {SECRETS} keys:")
+        report("decrypt environment, filter in Python", timed(decrypt_and_filter))
+        report("--prefix DB_ pushed into SQL", timed(pushdown))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Reading one value from a 1000-key environment: decrypt everything and pick vs get_secret_value
+"""
+from benchmarks.common import temp_vault, timed, report
+
+SECRETS = 1000
+
+
+def main():
+    with temp_vault() as vault:
+        vault.create_project("app")
+        env = vault.resolve("app", "dev")
+        vault.import_secrets(env.id, ((f"KEY_{i}", f"value-{i}") for i in range(SECRETS)))
+        vault._resolved.clear()
+        
+        def export_and_grep():
+            secrets = vault.get_secrets_by_path("app/dev")
+            results = vault.decrypt_many(secrets)
+            return next(r.value for s, r in zip(secrets, results) if s.key == "KEY_500")
+        
+        print(f"One key out of {SECRETS}:")
+        report("decrypt environment, pick one", timed(export_and_grep))
+        report("get_secret_value", timed(lambda: vault.get_secret_value("app/dev", "KEY_500")))
+
+
+if __name__ == "__main__":
+    main()
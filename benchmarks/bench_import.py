@@ -0,0 +1,40 @@
+"""
+Bulk import of a 10k-key .env file vs one add_secret call per key
+"""
+import os
+import tempfile
+from benchmarks.common import temp_vault, timed, report
+from src.importer import read_secrets
+
+KEYS = 10000
+# The per-key baseline is slow; time a sample and extrapolate
+BASELINE_SAMPLE = 200
+
+
+def write_env_file(path: str, count: int):
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(f'KEY_{i}="value-{i}-{os.urandom(12).hex()}"\n')
+
+
+def main():
+    with temp_vault() as vault, tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.env")
+        write_env_file(path, KEYS)
+        envs = iter(env for i in range(20) for env in vault.create_project(f"project-{i}").environments)
+        
+        def one_by_one():
+            env_id = next(envs).id
+            for key, value in list(read_secrets(path))[:BASELINE_SAMPLE]:
+                vault.add_secret(env_id, key, value)
+        
+        def bulk():
+            vault.import_secrets(next(envs).id, read_secrets(path))
+        
+        print(f"{KEYS} keys:")
+        report("add_secret per key (extrapolated)", timed(one_by_one, repeat=3) * KEYS / BASELINE_SAMPLE)
+        report("import_secrets", timed(bulk, repeat=3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+get_secrets latency at 1k/100k/1M rows, with and without the lookup indexes
+"""
+import os
+import sqlite3
+import tempfile
+from benchmarks.common import timed, report
+from src.vault import VaultManager
+
+SIZES = (1000, 100000, 1000000)
+SECRETS_PER_ENV = 100
+
+
+def fill(db_path: str, rows: int):
+    """Bulk-load rows secrets directly; values are random bytes, never decrypted"""
+    envs = rows // SECRETS_PER_ENV
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO projects (id, name) VALUES (?, ?)", ((i, f"project-{i}") for i in range(1, envs + 1)))
+    conn.executemany("INSERT INTO environments (id, project_id, name) VALUES (?, ?, 'dev')",
+                     ((i, i) for i in range(1, envs + 1)))
+    conn.executemany(
+        "INSERT INTO secrets (environment_id, key, encrypted_value) VALUES (?, ?, ?)",
+        ((i // SECRETS_PER_ENV + 1, f"KEY_{i % SECRETS_PER_ENV}", os.urandom(48)) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    for rows in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench_vault.db")
+            vault = VaultManager(db_path)
+            fill(db_path, rows)
+            env_id = rows // SECRETS_PER_ENV // 2
+            print(f"{rows} secrets:")
+            report("get_secrets, indexed", timed(lambda: vault.get_secrets(env_id)))
+            with vault.db.engine.begin() as conn:
+                conn.exec_driver_sql("DROP INDEX ix_secrets_environment_key")
+            report("get_secrets, full scan", timed(lambda: vault.get_secrets(env_id)))
+            vault.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+inject --command with a child that writes OUTPUT_MB of output: captured (run_with_secrets) vs
+streamed through bounded pipes (run_piped); wall time and peak memory of the injecting process
+"""
+import subprocess
+import sys
+
+OUTPUT_MB = 200
+# Child writes OUTPUT_MB of 1 KiB lines
+CHILD = f"{sys.executable} -c \"import sys; line = 'x' * 1023 + chr(10); [sys.stdout.write(line) for _ in range({OUTPUT_MB} * 1024)]\""
+
+MODES = {
+    "captured (run_with_secrets)": "InjectionEngine.run_with_secrets(secrets, CHILD)",
+    "streamed (run_piped)": "InjectionEngine.run_piped(secrets, CHILD, stdout=sink, stderr=sink)",
+}
+
+RUNNER = """
+import os, resource, sys, time
+from src.injector import InjectionEngine
+CHILD = sys.argv[1]
+secrets = {"API_KEY": "value"}
+sink = open(os.devnull, "wb")
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def main():
+    print(f"Child output: {OUTPUT_MB} MB")
+    for label, call in MODES.items():
+        result = subprocess.run([sys.executable, "-c", RUNNER % call, CHILD],
+                                capture_output=True, text=True, check=True)
+        seconds, max_rss_kb = result.stdout.split()
+        print(f"  {label:<40} {float(seconds) * 1000:10.2f} ms {int(max_rss_kb) / 1024:10.1f} MB peak RSS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Listing a 50k-key environment: get_secrets vs keyset pages (first page latency, peak memory)
+"""
+import os
+import sqlite3
+import tempfile
+import tracemalloc
+from benchmarks.common import timed, report
+from src.vault import VaultManager
+
+ROWS = 50000
+
+
+def fill(db_path: str):
+    """Bulk-load one environment directly; values are random bytes, never decrypted"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO projects (id, name) VALUES (1, 'project')")
+    conn.execute("INSERT INTO environments (id, project_id, name) VALUES (1, 1, 'dev')")
+    conn.executemany(
+        "INSERT INTO secrets (environment_id, key, encrypted_value) VALUES (1, ?, ?)",
+        ((f"KEY_{i:06d}", os.urandom(48)) for i in range(ROWS))
+    )
+    conn.commit()
+    conn.close()
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_vault.db")
+        vault = VaultManager(db_path)
+        fill(db_path)
+        
+        def consume_all():
+            for _ in vault.get_secrets(1):
+                pass
+        
+        def consume_pages():
+            for _ in vault.iter_secrets(1):
+                pass
+        
+        print(f"{ROWS} secrets in one environment:")
+        report("get_secrets (whole environment)", timed(lambda: vault.get_secrets(1), repeat=3))
+        report("first page", timed(lambda: vault.get_secrets_page(1), repeat=3))
+        report("page deep in the environment", timed(lambda: vault.get_secrets_page(1, "KEY_045000"), repeat=3))
+        report("iter_secrets (all pages)", timed(consume_pages, repeat=3))
+        for label, fn in (("get_secrets", consume_all), ("iter_secrets", consume_pages)):
+            print(f"  {label + ', peak memory':<40} {peak_memory(fn) / 1024 / 1024:10.1f} MiB")
+        vault.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
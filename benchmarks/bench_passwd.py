@@ -0,0 +1,56 @@
+"""
+Master-password change time: envelope re-wrap vs re-encrypting every secret
+"""
+from benchmarks.common import PASSWORD, temp_vault, timed, report
+from src.crypto import CryptoEngine
+from src.database import Environment, Secret
+
+PROJECTS = 34            # x3 default environments
+SECRETS_PER_ENV = 1000
+
+
+def fill_vault(vault):
+    for p in range(PROJECTS):
+        vault.create_project(f"project-{p}")
+    session = vault.db.get_session()
+    for env in session.query(Environment).all():
+        env_crypto = vault._environment_crypto(env.id)
+        session.add_all(
+            Secret(environment_id=env.id, key=f"KEY_{i}", encrypted_value=env_crypto.encrypt(f"value-{i}"))
+            for i in range(SECRETS_PER_ENV)
+        )
+    session.commit()
+    session.close()
+
+
+def reencrypt_all(vault):
+    """What a password change costs without envelope encryption"""
+    new_crypto = CryptoEngine()
+    new_crypto.derive_key("another-password", new_crypto.generate_salt())
+    session = vault.db.get_session()
+    for secret in session.query(Secret).all():
+        plaintext = vault._environment_crypto(secret.environment_id).decrypt(secret.encrypted_value)
+        secret.encrypted_value = new_crypto.encrypt(plaintext)
+    session.rollback()
+    session.close()
+
+
+def main():
+    with temp_vault() as vault:
+        fill_vault(vault)
+        envs = PROJECTS * 3
+        print(f"{envs} environments, {envs * SECRETS_PER_ENV} secrets:")
+        passwords = iter([PASSWORD, "new-password-1", "new-password-2", "new-password-3"])
+        current = [next(passwords)]
+
+        def change_password():
+            new = next(passwords)
+            vault.change_password(current[0], new)
+            current[0] = new
+
+        report("envelope re-wrap (ldcm passwd)", timed(change_password, repeat=3))
+        report("re-encrypt every secret (no commit)", timed(lambda: reencrypt_all(vault), repeat=1))
+
+
+if __name__ == "__main__":
+    main()
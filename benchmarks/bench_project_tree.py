@@ -0,0 +1,47 @@
+"""
+Project listing at 5k projects: one query per project (N+1) vs get_project_tree
+"""
+import os
+import sqlite3
+import tempfile
+from benchmarks.common import timed, report
+from src.vault import VaultManager
+
+PROJECTS = 5000
+ENVIRONMENTS = ("dev", "staging", "test")
+SECRETS_PER_ENV = 5
+
+
+def fill(db_path: str):
+    """Bulk-load projects, environments and secrets directly; values are never decrypted"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO projects (id, name) VALUES (?, ?)", ((i, f"project-{i}") for i in range(1, PROJECTS + 1)))
+    envs = [(p * 3 + n, p, name) for p in range(1, PROJECTS + 1) for n, name in enumerate(ENVIRONMENTS)]
+    conn.executemany("INSERT INTO environments (id, project_id, name) VALUES (?, ?, ?)", envs)
+    conn.executemany(
+        "INSERT INTO secrets (environment_id, key, encrypted_value) VALUES (?, ?, ?)",
+        ((env_id, f"KEY_{i}", os.urandom(48)) for env_id, _, _ in envs for i in range(SECRETS_PER_ENV))
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_vault.db")
+        vault = VaultManager(db_path)
+        fill(db_path)
+        
+        def n_plus_one():
+            for project in vault.get_projects():
+                vault.get_environments(project.id)
+        
+        print(f"{PROJECTS} projects, {len(ENVIRONMENTS)} environments each:")
+        report("get_projects + get_environments each", timed(n_plus_one, repeat=3))
+        report("get_project_tree", timed(vault.get_project_tree, repeat=3))
+        report("get_project_tree(include_keys=True)", timed(lambda: vault.get_project_tree(include_keys=True), repeat=3))
+        vault.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
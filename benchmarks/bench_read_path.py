@@ -0,0 +1,63 @@
+"""
+get_secrets at 100k rows: detached ORM instances vs Core rows mapped to SecretRecords
+"""
+import os
+import sqlite3
+import tempfile
+import tracemalloc
+from benchmarks.common import timed, report
+from src.database import Secret
+from src.vault import VaultManager
+
+ROWS = 100000
+
+
+def fill(db_path: str):
+    """Bulk-load one environment directly; values are random bytes, never decrypted"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO projects (id, name) VALUES (1, 'project')")
+    conn.execute("INSERT INTO environments (id, project_id, name) VALUES (1, 1, 'dev')")
+    conn.executemany(
+        "INSERT INTO secrets (environment_id, key, encrypted_value) VALUES (1, ?, ?)",
+        ((f"KEY_{i}", os.urandom(48)) for i in range(ROWS))
+    )
+    conn.commit()
+    conn.close()
+
+
+def peak_memory(fn) -> int:
+    """Peak traced bytes while fn() runs and its result is alive"""
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_vault.db")
+        vault = VaultManager(db_path)
+        fill(db_path)
+        
+        def orm_path():
+            session = vault.db.get_session()
+            try:
+                return session.query(Secret).filter_by(environment_id=1).all()
+            finally:
+                session.close()
+        
+        def core_path():
+            return vault.get_secrets(1)
+        
+        print(f"{ROWS} secrets:")
+        report("ORM instances", timed(orm_path, repeat=3))
+        report("Core -> SecretRecord", timed(core_path, repeat=3))
+        for label, fn in (("ORM instances", orm_path), ("Core -> SecretRecord", core_path)):
+            print(f"  {label + ', peak memory':<40} {peak_memory(fn) / 1024 / 1024:10.1f} MiB")
+        vault.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+--redact throughput: 1000 secret values (plus a few short ones such as a port and a flag) masked in
+a 1 GB log, streamed in INJECT_PIPE_CHUNK pieces, for a log that never prints a secret and one where
+one line in fifty does
+"""
+import random
+import string
+import time
+from src.config import INJECT_PIPE_CHUNK
+from src.redact import RedactingStream, Redactor
+
+SECRETS = 1000
+SHORT_VALUES = ["5432", "true"]
+LOG_MB = 1024
+BLOCK_MB = 4
+
+
+class NullSink:
+    def write(self, data: bytes):
+        return len(data)
+    
+    def flush(self):
+        pass
+
+
+def make_block(values: list, rng: random.Random, echo_rate: float) -> bytes:
+    """BLOCK_MB of log lines, echo_rate of them printing a secret value"""
+    lines = []
+    size = 0
+    while size < BLOCK_MB * 1024 * 1024:
+        if rng.random() < echo_rate:
+            line = f"DEBUG config loaded: token={rng.choice(values)}\n"
+        else:
+            line = f"INFO request {rng.randrange(10 ** 6)} served in {rng.random() * 100:.2f} ms from worker-{rng.randrange(64)}\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines).encode()
+
+
+def main():
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits
+    values = ["".join(rng.choice(alphabet) for _ in range(rng.randrange(16, 48))) for _ in range(SECRETS)]
+    start = time.perf_counter()
+    redactor = Redactor(values + SHORT_VALUES)
+    build = time.perf_counter() - start
+    print(f"{SECRETS} + {len(SHORT_VALUES)} short secrets, {LOG_MB} MB log ({redactor.backend}):")
+    print(f"  {'build automaton':<40} {build * 1000:10.2f} ms")
+    for label, echo_rate in (("no secrets in output", 0), ("1 line in 50 echoes a secret", 0.02)):
+        block = make_block(values, rng, echo_rate)
+        chunks = [block[i:i + INJECT_PIPE_CHUNK] for i in range(0, len(block), INJECT_PIPE_CHUNK)]
+        stream = RedactingStream(NullSink(), redactor)
+        start = time.perf_counter()
+        for _ in range(LOG_MB // BLOCK_MB):
+            for chunk in chunks:
+                stream.write(chunk)
+        stream.close()
+        seconds = time.perf_counter() - start
+        print(f"  {label:<40} {seconds * 1000:10.2f} ms {LOG_MB / seconds:10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Project/environment lookup: get_projects() + linear scans vs one joined query
+"""
+import sqlite3
+from benchmarks.common import temp_vault, timed, report
+
+PROJECTS = 5000
+
+
+def fill(db_path: str):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO projects (id, name) VALUES (?, ?)",
+                     ((i, f"project-{i}") for i in range(1, PROJECTS + 1)))
+    conn.executemany("INSERT INTO environments (project_id, name) VALUES (?, ?)",
+                     ((i, env) for i in range(1, PROJECTS + 1) for env in ("dev", "staging", "test")))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    with temp_vault() as vault:
+        fill(vault.db.db_path)
+        name = f"project-{PROJECTS // 2}"
+
+        def scan_lookup():
+            project = next(p for p in vault.get_projects() if p.name == name)
+            env = next(e for e in vault.get_environments(project.id) if e.name == "staging")
+            return vault.get_secrets(env.id)
+
+        def path_lookup():
+            vault._resolved.clear()
+            return vault.get_secrets_by_path(f"{name}/staging")
+
+        print(f"{PROJECTS} projects:")
+        report("get_projects + scans", timed(scan_lookup))
+        report("get_secrets_by_path (joined query)", timed(path_lookup))
+        report("get_secrets_by_path (resolved cache)", timed(lambda: vault.get_secrets_by_path(f"{name}/staging")))
+
+
+if __name__ == "__main__":
+    main()
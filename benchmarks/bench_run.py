@@ -0,0 +1,45 @@
+"""
+Preparing a 10-service stack: one unlock/resolve/decrypt per service (ldcm inject each) vs
+ldcm run (one unlock, one batched query, one decrypt batch)
+"""
+from benchmarks.common import PASSWORD, temp_vault, timed, report
+from src.vault import VaultManager
+
+SERVICES = 10
+SECRETS = 50
+
+
+def main():
+    with temp_vault() as vault:
+        paths = []
+        for i in range(SERVICES):
+            vault.create_project(f"svc{i}")
+            env = vault.resolve(f"svc{i}", "dev")
+            vault.import_secrets(env.id, ((f"KEY_{j}", f"value-{i}-{j}") for j in range(SECRETS)))
+            paths.append(f"svc{i}/dev")
+        db_path = vault.db.db_path
+        
+        def one_process_per_service():
+            for path in paths:
+                service_vault = VaultManager(db_path)
+                service_vault.unlock(PASSWORD)
+                secrets = service_vault.get_secrets_by_path(path)
+                service_vault.decrypt_many(secrets)
+                service_vault.lock()
+                service_vault.db.engine.dispose()
+        
+        def run_file():
+            stack_vault = VaultManager(db_path)
+            stack_vault.unlock(PASSWORD)
+            found = stack_vault.get_secrets_by_paths(paths)
+            stack_vault.decrypt_many([secret for path in paths for secret in found[path]])
+            stack_vault.lock()
+            stack_vault.db.engine.dispose()
+        
+        print(f"{SERVICES} services, {SECRETS} secrets each:")
+        report("unlock + resolve + decrypt per service", timed(one_process_per_service, repeat=3))
+        report("ldcm run (unlock once, batched)", timed(run_file, repeat=3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Key search across 1M secrets: trigram FTS5 index vs LIKE over the joined tables
+"""
+import os
+import sqlite3
+import tempfile
+from sqlalchemy import text
+from benchmarks.common import timed, report
+from src.vault import VaultManager
+
+ROWS = 1000000
+SECRETS_PER_ENV = 100
+KEY_NAMES = ("DATABASE_URL", "REDIS_URL", "STRIPE_API_KEY", "SENTRY_DSN", "AWS_ACCESS_KEY_ID")
+
+
+def fill(db_path: str):
+    """Bulk-load secrets directly (the index triggers still fire); values are never decrypted"""
+    envs = ROWS // SECRETS_PER_ENV
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO projects (id, name) VALUES (?, ?)", ((i, f"project-{i}") for i in range(1, envs + 1)))
+    conn.executemany("INSERT INTO environments (id, project_id, name) VALUES (?, ?, 'dev')",
+                     ((i, i) for i in range(1, envs + 1)))
+    conn.executemany(
+        "INSERT INTO secrets (environment_id, key, encrypted_value) VALUES (?, ?, ?)",
+        ((i // SECRETS_PER_ENV + 1, f"{KEY_NAMES[i % len(KEY_NAMES)]}_{i % SECRETS_PER_ENV}", os.urandom(48))
+         for i in range(ROWS))
+    )
+    # One key defined in a single environment
+    conn.execute("INSERT INTO secrets (environment_id, key, encrypted_value) VALUES (4242, 'LEGACY_PAYMENT_TOKEN', x'00')")
+    conn.commit()
+    conn.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_vault.db")
+        vault = VaultManager(db_path)
+        fill(db_path)
+        
+        def like_scan(pattern):
+            with vault.db.engine.connect() as conn:
+                return conn.execute(text(
+                    "SELECT s.id, p.name, e.name, s.key FROM secrets s "
+                    "JOIN environments e ON e.id = s.environment_id JOIN projects p ON p.id = e.project_id "
+                    "WHERE s.key LIKE :pattern ORDER BY 2, 3, 4 LIMIT 100"
+                ), {"pattern": pattern}).all()
+        
+        print(f"{ROWS} secrets:")
+        report("1 hit, LIKE over tables", timed(lambda: like_scan("%PAYMENT_TOK%"), repeat=3))
+        report("1 hit, substring", timed(lambda: vault.search_keys("PAYMENT_TOK"), repeat=3))
+        report("1 hit, prefix glob 'LEGACY_*'", timed(lambda: vault.search_keys("LEGACY_*"), repeat=3))
+        report("10k hits, LIKE over tables", timed(lambda: like_scan("%STRIPE_API_KEY_42%"), repeat=3))
+        report("10k hits, substring", timed(lambda: vault.search_keys("STRIPE_API_KEY_42"), repeat=3))
+        report("10k hits, glob 'AWS_*_ID_99'", timed(lambda: vault.search_keys("AWS_*_ID_99"), repeat=3))
+        report("project name 'project-4242'", timed(lambda: vault.search_keys("project-4242", "project"), repeat=3))
+        vault.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+CLI startup cost: wall time of commands that need no crypto, and `-X importtime` for src.cli
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 10
+COMMANDS = (
+    ("python (interpreter only)", ["-c", "pass"]),
+    ("ldcm --version", ["-m", "src.cli", "--version"]),
+    ("ldcm --help", ["-m", "src.cli", "--help"]),
+    ("ldcm agent --status", ["-m", "src.cli", "agent", "--status"]),
+)
+
+
+def wall_ms(argv, env) -> float:
+    """Median wall time of running the interpreter with argv"""
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def import_time_ms(module: str, env) -> float:
+    """Cumulative import time of module as reported by -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    return float("nan")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as home:
+        # No vault and no agent socket: measures startup only
+        env = {**os.environ, "HOME": home, "LDCM_AGENT_SOCK": os.path.join(home, "agent.sock")}
+        print(f"Median of {RUNS} runs:")
+        for label, argv in COMMANDS:
+            print(f"  {label:<40} {wall_ms(argv, env):10.2f} ms")
+        print("Import time:")
+        for module in ("src.cli", "src.vault"):
+            print(f"  {'import ' + module:<40} {import_time_ms(module, env):10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
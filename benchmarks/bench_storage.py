@@ -0,0 +1,54 @@
+"""
+On-disk size and read/decrypt throughput: base64 text vs raw binary ciphertext
+"""
+import base64
+import os
+import sqlite3
+import tempfile
+from benchmarks.common import temp_vault, timed, report
+
+SECRETS = 50000
+
+
+def write_vault(path: str, values: list):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE secrets (id INTEGER PRIMARY KEY, key TEXT, encrypted_value BLOB)")
+    conn.executemany("INSERT INTO secrets (key, encrypted_value) VALUES (?, ?)",
+                     ((f"KEY_{i}", v) for i, v in enumerate(values)))
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def read_all(path: str) -> list:
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT encrypted_value FROM secrets")]
+    finally:
+        conn.close()
+
+
+def main():
+    with temp_vault() as vault, tempfile.TemporaryDirectory() as tmp:
+        crypto = vault.crypto
+        binary = [crypto.encrypt(f"value-{i}-" + "x" * 40) for i in range(SECRETS)]
+        text = [base64.b64encode(v).decode('utf-8') for v in binary]
+
+        text_path = os.path.join(tmp, "text.db")
+        binary_path = os.path.join(tmp, "binary.db")
+        write_vault(text_path, text)
+        write_vault(binary_path, binary)
+
+        print(f"{SECRETS} secrets:")
+        print(f"  {'file size, base64 text':<40} {os.path.getsize(text_path) / 1024:10.0f} KiB")
+        print(f"  {'file size, raw binary':<40} {os.path.getsize(binary_path) / 1024:10.0f} KiB")
+        report("read + decrypt, base64 text", timed(
+            lambda: [crypto.decrypt(base64.b64decode(v.encode('utf-8'))) for v in read_all(text_path)], repeat=3
+        ))
+        report("read + decrypt, raw binary", timed(
+            lambda: [crypto.decrypt(v) for v in read_all(binary_path)], repeat=3
+        ))
+
+
+if __name__ == "__main__":
+    main()
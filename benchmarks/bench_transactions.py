@@ -0,0 +1,41 @@
+"""
+Cost per inserted secret: one commit per add_secret vs one shared transaction
+"""
+import itertools
+from benchmarks.common import temp_vault, timed, report
+
+SECRETS = 500
+
+
+def main():
+    with temp_vault() as vault:
+        counter = itertools.count()
+        
+        def new_env():
+            project = vault.create_project(f"project-{next(counter)}")
+            return project.environments[0].id
+        
+        items = [(f"KEY_{i}", f"value-{i}") for i in range(SECRETS)]
+        
+        def one_commit_each():
+            env_id = new_env()
+            for key, value in items:
+                vault.add_secret(env_id, key, value)
+        
+        def shared_transaction():
+            env_id = new_env()
+            with vault.transaction():
+                for key, value in items:
+                    vault.add_secret(env_id, key, value)
+        
+        def batch():
+            vault.add_secrets(new_env(), items)
+        
+        print(f"{SECRETS} secrets, cost per insert:")
+        report("add_secret, one commit each", timed(one_commit_each, repeat=3) / SECRETS)
+        report("add_secret in vault.transaction()", timed(shared_transaction, repeat=3) / SECRETS)
+        report("add_secrets", timed(batch, repeat=3) / SECRETS)
+
+
+if __name__ == "__main__":
+    main()
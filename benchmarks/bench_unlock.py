@@ -0,0 +1,64 @@
+"""
+Unlock time for the legacy (Argon2 verify + PBKDF2) and single-KDF formats
+"""
+import os
+import tempfile
+from benchmarks.common import PASSWORD, timed, report
+from src.crypto import CryptoEngine, KDF_LEGACY
+from src.database import Secret, VaultSettings
+from src.vault import VaultManager
+
+SECRETS = 1000
+
+
+def create_legacy_vault(db_path: str):
+    """Write a vault the way releases before the single-KDF format did"""
+    vault = VaultManager(db_path)
+    crypto = CryptoEngine()
+    password_hash, salt = crypto.hash_password(PASSWORD)
+    crypto.derive_legacy_key(PASSWORD, salt)
+    session = vault.db.get_session()
+    session.add(VaultSettings(master_password_hash=password_hash, salt=salt, kdf_version=KDF_LEGACY))
+    vault.create_project("bench")
+    env = vault.get_environments(vault.get_projects()[0].id)[0]
+    session.add_all(
+        Secret(environment_id=env.id, key=f"KEY_{i}", encrypted_value=crypto.encrypt(f"value-{i}"))
+        for i in range(SECRETS)
+    )
+    session.commit()
+    session.close()
+    vault.db.engine.dispose()
+
+
+def main():
+    crypto = CryptoEngine()
+    password_hash, salt = crypto.hash_password(PASSWORD)
+    crypto.derive_key(PASSWORD, salt)
+    key_check = crypto.create_key_check()
+    
+    def legacy_unlock():
+        engine = CryptoEngine()
+        engine.verify_password(PASSWORD, password_hash, salt)
+        engine.derive_legacy_key(PASSWORD, salt)
+    
+    def single_kdf_unlock():
+        engine = CryptoEngine()
+        engine.derive_key(PASSWORD, salt)
+        engine.verify_key_check(key_check)
+    
+    print("Unlock time:")
+    report("legacy (Argon2 verify + PBKDF2)", timed(legacy_unlock))
+    report("single KDF (Argon2id + key check)", timed(single_kdf_unlock))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "legacy_vault.db")
+        create_legacy_vault(db_path)
+        vault = VaultManager(db_path)
+        report(f"first unlock + migration ({SECRETS} secrets)", timed(lambda: vault.unlock(PASSWORD), repeat=1))
+        vault.lock()
+        report("unlock after migration", timed(lambda: vault.unlock(PASSWORD)))
+        vault.db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
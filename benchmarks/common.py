@@ -0,0 +1,38 @@
+"""
+Shared helpers for LDCM benchmarks
+
+Run benchmarks from the repository root, e.g.:
+    python -m benchmarks.bench_agent
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from src.vault import VaultManager
+
+PASSWORD = "benchmark-password"
+
+
+@contextmanager
+def temp_vault(password: str = PASSWORD):
+    """Yield an initialized, unlocked vault in a throwaway directory"""
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = VaultManager(os.path.join(tmp, "bench_vault.db"))
+        vault.initialize(password)
+        yield vault
+        vault.lock()
+        vault.db.engine.dispose()
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """Best wall time of fn() over repeat runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, seconds: float):
+    print(f"  {label:<40} {seconds * 1000:10.2f} ms")
@@ -0,0 +1,245 @@
+"""
+LDCM key agent
+
+Holds an unlocked vault key in a background process and serves crypto
+requests over a permission-restricted Unix socket, so CLI commands can
+skip the password prompt and key derivation on every call.
+"""
+import base64
+import json
+import os
+import socket
+import socketserver
+import time
+from src.config import AGENT_SOCKET_NAME, AUTO_LOCK_MINUTES
+from src.crypto import CryptoEngine, DecryptResult
+
+
+def default_socket_path() -> str:
+    """Socket path, overridable with LDCM_AGENT_SOCK"""
+    return os.environ.get(
+        "LDCM_AGENT_SOCK",
+        os.path.join(os.path.expanduser("~"), ".ldcm", AGENT_SOCKET_NAME)
+    )
+
+
+def _b64(data) -> str:
+    """Ciphertext travels base64-encoded inside the JSON protocol"""
+    return base64.b64encode(data).decode('ascii')
+
+
+class AgentError(Exception):
+    """Raised when the agent cannot serve a request"""
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        if not server.check_peer(self.request):
+            return
+        for line in self.rfile:
+            request = {}
+            try:
+                request = json.loads(line)
+                response = {"ok": True, "result": server.agent.dispatch(request)}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            # Stop only once the client has its answer
+            if request.get("op") == "lock":
+                server.agent.stop()
+                return
+
+
+class _AgentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    
+    def __init__(self, socket_path, agent):
+        self.agent = agent
+        # Create the socket owner-only from the start, not chmod'ed afterwards
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _AgentHandler)
+        finally:
+            os.umask(old_umask)
+    
+    def check_peer(self, conn) -> bool:
+        """Only serve processes running as the same user"""
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12)
+        uid = int.from_bytes(creds[4:8], "little")
+        return uid == os.getuid()
+    
+    def handle_timeout(self):
+        self.agent.check_idle()
+
+
+class KeyAgent:
+    """Serves an unlocked VaultManager until idle for idle_timeout seconds"""
+    
+    def __init__(self, vault, socket_path: str = None, idle_timeout: float = AUTO_LOCK_MINUTES * 60):
+        if not vault.is_unlocked:
+            raise ValueError("Vault is locked")
+        self.vault = vault
+        self.socket_path = socket_path or default_socket_path()
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+        self._running = False
+        self._server = None
+    
+    def dispatch(self, request: dict):
+        """Handle a single decoded request"""
+        op = request.get("op")
+        if not self.vault.is_unlocked:
+            raise AgentError("Agent is locked")
+        self.last_used = time.monotonic()
+        if op == "ping":
+            return {"db_path": os.path.abspath(self.vault.db.db_path), "pid": os.getpid()}
+        if op == "encrypt":
+            return _b64(self.vault.crypto.encrypt(request["plaintext"]))
+        if op == "decrypt":
+            return self.vault.crypto.decrypt(base64.b64decode(request["value"]))
+        if op == "decrypt_batch":
+            results = self.vault.crypto.decrypt_batch([base64.b64decode(v) for v in request["values"]])
+            return [[r.value, None if r.ok else str(r.error)] for r in results]
+        if op == "wrap_key":
+            return _b64(self.vault.crypto.wrap_key(base64.b64decode(request["key"])))
+        if op == "unwrap_key":
+            return _b64(self.vault.crypto.unwrap_key(base64.b64decode(request["wrapped_key"])))
+        if op == "lock":
+            return None
+        raise AgentError(f"Unknown operation '{op}'")
+    
+    def check_idle(self):
+        """Lock once AUTO_LOCK_MINUTES have passed without a request"""
+        if time.monotonic() - self.last_used >= self.idle_timeout:
+            self.stop()
+    
+    def stop(self):
+        """Lock the vault and stop serving"""
+        self.vault.lock()
+        self._running = False
+    
+    def serve(self):
+        """Serve requests in the current process until locked"""
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if AgentClient(self.socket_path).is_running():
+                raise AgentError("An agent is already running")
+            os.unlink(self.socket_path)
+        self._server = _AgentServer(self.socket_path, self)
+        self._server.timeout = 1.0
+        self._running = True
+        try:
+            while self._running:
+                self._server.handle_request()
+        finally:
+            self._server.server_close()
+            self.vault.lock()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+    
+    def daemonize(self):
+        """Detach from the terminal and serve in the background (Unix only)"""
+        if os.fork() > 0:
+            return False
+        os.setsid()
+        if os.fork() > 0:
+            os._exit(0)
+        # Never reuse SQLite connections inherited from the parent
+        self.vault.db.engine.dispose(close=False)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        try:
+            self.serve()
+        finally:
+            os._exit(0)
+
+
+class AgentClient:
+    """Client side of the agent protocol (one JSON object per line)"""
+    
+    def __init__(self, socket_path: str = None, timeout: float = 5.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+    
+    def _connect(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._sock = sock
+            self._file = sock.makefile('rwb')
+    
+    def call(self, op: str, **params):
+        """Send a request and return its result, raising AgentError on failure"""
+        try:
+            self._connect()
+            self._file.write(json.dumps({"op": op, **params}).encode('utf-8') + b'\n')
+            self._file.flush()
+            line = self._file.readline()
+        except OSError as e:
+            self.close()
+            raise AgentError(f"Agent unavailable: {e}")
+        if not line:
+            self.close()
+            raise AgentError("Agent closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise AgentError(response["error"])
+        return response["result"]
+    
+    def is_running(self, db_path: str = None) -> bool:
+        """Check whether an unlocked agent is serving (optionally for db_path)"""
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(self.socket_path):
+            return False
+        try:
+            info = self.call("ping")
+        except AgentError:
+            return False
+        return db_path is None or info["db_path"] == os.path.abspath(db_path)
+    
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+            except OSError:
+                # A request left buffered by a failed call cannot be flushed to an agent that is gone
+                pass
+            finally:
+                self._sock.close()
+                self._sock = None
+                self._file = None
+
+
+class AgentCrypto(CryptoEngine):
+    """CryptoEngine that delegates master-key operations to a running agent (data keys are used locally)"""
+    
+    def __init__(self, client: AgentClient):
+        super().__init__()
+        self.client = client
+    
+    def encrypt(self, plaintext: str) -> bytes:
+        return base64.b64decode(self.client.call("encrypt", plaintext=plaintext))
+    
+    def decrypt(self, encrypted: bytes) -> str:
+        return self.client.call("decrypt", value=_b64(encrypted))
+    
+    def wrap_key(self, data_key: bytes) -> bytes:
+        return base64.b64decode(self.client.call("wrap_key", key=_b64(data_key)))
+    
+    def unwrap_key(self, wrapped_key: bytes) -> bytes:
+        return base64.b64decode(self.client.call("unwrap_key", wrapped_key=_b64(wrapped_key)))
+    
+    def decrypt_batch(self, encrypted_values: list, max_workers: int = None) -> list:
+        results = self.client.call("decrypt_batch", values=[_b64(v) for v in encrypted_values])
+        return [DecryptResult(value, AgentError(error) if error else None) for value, error in results]
+    
+    def clear_key(self):
+        """Drop the connection; the agent keeps its own key"""
+        self.client.close()
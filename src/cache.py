@@ -0,0 +1,86 @@
+"""
+Bounded LRU cache of decrypted secret values
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class DecryptCache:
+    """Maps secret id -> plaintext, valid only while the stored ciphertext is unchanged"""
+    
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # secret_id -> (ciphertext digest, plaintext, expires_at), LRU first
+        # secret_id -> expires_at in put order; one TTL for all, so this is also expiry order
+        self._expiry = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _remove(self, secret_id: int):
+        self._entries.pop(secret_id, None)
+        self._expiry.pop(secret_id, None)
+    
+    def _purge_expired(self):
+        """Drop expired plaintexts, not only the ones looked up again: the TTL bounds their time in memory"""
+        now = time.monotonic()
+        while self._expiry:
+            secret_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            self._remove(secret_id)
+    
+    @staticmethod
+    def _digest(encrypted_value) -> bytes:
+        return hashlib.sha256(encrypted_value).digest()
+    
+    def get(self, secret_id: int, encrypted_value):
+        """Cached plaintext, or None on a miss, expiry or changed ciphertext"""
+        with self._lock:
+            self._purge_expired()
+            entry = self._entries.get(secret_id)
+            if entry is not None:
+                digest, value, _ = entry
+                if digest == self._digest(encrypted_value):
+                    self._entries.move_to_end(secret_id)
+                    self.hits += 1
+                    return value
+                self._remove(secret_id)
+            self.misses += 1
+            return None
+    
+    def put(self, secret_id: int, encrypted_value, value: str):
+        with self._lock:
+            self._purge_expired()
+            expires_at = time.monotonic() + self.ttl_seconds
+            self._entries[secret_id] = (self._digest(encrypted_value), value, expires_at)
+            self._entries.move_to_end(secret_id)
+            self._expiry[secret_id] = expires_at
+            self._expiry.move_to_end(secret_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate(self, secret_id: int):
+        with self._lock:
+            self._remove(secret_id)
+    
+    def clear(self):
+        """Drop every plaintext reference (called on lock)"""
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -5,28 +5,61 @@ import argparse
 import getpass
 import os
 import sys
-from src.config import DB_NAME, APP_VERSION
-from src.vault import VaultManager
-from src.injector import InjectionEngine
+from src.config import (DB_NAME, APP_VERSION, AUTO_LOCK_MINUTES, KDF_TARGET_MS, CONFLICT_POLICIES, IMPORT_FORMATS,
+                        INJECT_MODES, RUN_FILE, SEARCH_FIELDS, SEARCH_LIMIT)
+
+# Vault, crypto, agent and injector modules are imported by the commands that use them,
+# so --help and --version never load SQLAlchemy or the crypto libraries
 
 class CLI:
     def __init__(self):
-        db_path = os.path.join(os.path.expanduser("~"), ".ldcm", DB_NAME)
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.vault = VaultManager(db_path)
+        self.db_path = os.path.join(os.path.expanduser("~"), ".ldcm", DB_NAME)
+        self._vault = None
+    
+    @property
+    def vault(self):
+        """VaultManager, opened on first use"""
+        if self._vault is None:
+            from src.vault import VaultManager
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._vault = VaultManager(self.db_path)
+        return self._vault
     
     def unlock_vault(self) -> bool:
-        """Prompt for password and unlock vault"""
+        """Prompt for password and unlock vault; failures go to stderr, stdout may be piped secrets"""
         if not self.vault.is_initialized():
-            print("Vault not initialized. Run 'ldcm init' first.")
+            print("Vault not initialized. Run 'ldcm init' first.", file=sys.stderr)
             return False
         
+        from src.agent import AgentClient, AgentCrypto
+        client = AgentClient()
+        if client.is_running(self.db_path):
+            return self.vault.unlock_with(AgentCrypto(client))
+        
         password = getpass.getpass("Master Password: ")
         if self.vault.unlock(password):
             return True
-        print("Invalid password.")
+        print("Invalid password.", file=sys.stderr)
         return False
     
+    def key_filter(self, args):
+        """KeyFilter from --only/--exclude/--prefix, or None to select every key"""
+        if not (args.only or args.exclude or args.prefix):
+            return None
+        from src.vault import KeyFilter
+        return KeyFilter(tuple(args.only or ()), tuple(args.exclude or ()), tuple(args.prefix or ()))
+    
+    def decrypt_all(self, secrets, rename=None) -> dict:
+        """Decrypt secrets in one batch, warning about any that fail; rename maps output key names"""
+        results = self.vault.decrypt_many(secrets)
+        decrypted = {}
+        for secret, result in zip(secrets, results):
+            if result.ok:
+                decrypted[rename(secret.key) if rename else secret.key] = result.value
+            else:
+                print(f"Warning: could not decrypt '{secret.key}': {result.error}", file=sys.stderr)
+        return decrypted
+    
     def cmd_init(self, args):
         """Initialize a new vault"""
         if self.vault.is_initialized():
@@ -44,17 +77,155 @@ class CLI:
             print("Password must be at least 8 characters.")
             return
         
-        if self.vault.initialize(password):
+        from src.crypto import calibrate_kdf
+        print(f"Calibrating key derivation for ~{args.target_ms} ms...")
+        kdf_params = calibrate_kdf(args.target_ms)
+        if self.vault.initialize(password, kdf_params):
             print("✓ Vault initialized successfully.")
         else:
             print("Failed to initialize vault.")
     
+    def cmd_kdf_tune(self, args):
+        """Re-calibrate the key derivation cost for this host"""
+        if not self.vault.is_initialized():
+            print("Vault not initialized. Run 'ldcm init' first.")
+            return
+        
+        from src.crypto import calibrate_kdf
+        from src.agent import AgentClient
+        current = self.vault.get_kdf_params()
+        print(f"Current:  time_cost={current.time_cost} memory={current.memory_cost} KiB parallelism={current.parallelism}")
+        kdf_params = calibrate_kdf(args.target_ms)
+        print(f"Proposed: time_cost={kdf_params.time_cost} memory={kdf_params.memory_cost} KiB parallelism={kdf_params.parallelism}")
+        if args.dry_run:
+            return
+        
+        password = getpass.getpass("Master Password: ")
+        if not self.vault.unlock(password):
+            print("Invalid password.")
+            return
+        
+        # A running agent would keep encrypting with the old key
+        client = AgentClient()
+        if client.is_running(self.db_path):
+            client.call("lock")
+            print("Stopped the running agent; restart it with 'ldcm agent'.")
+        
+        # Already verified by unlock(): re-key without deriving the old key a second time
+        self.vault.rekey(password, kdf_params)
+        print("✓ Vault re-keyed with new parameters.")
+    
+    def cmd_passwd(self, args):
+        """Change the master password"""
+        if not self.vault.is_initialized():
+            print("Vault not initialized. Run 'ldcm init' first.")
+            return
+        
+        old_password = getpass.getpass("Current Master Password: ")
+        new_password = getpass.getpass("New Master Password: ")
+        confirm = getpass.getpass("Confirm New Password: ")
+        
+        if new_password != confirm:
+            print("Passwords do not match.")
+            return
+        
+        if len(new_password) < 8:
+            print("Password must be at least 8 characters.")
+            return
+        
+        if not self.vault.unlock(old_password):
+            print("Invalid password.")
+            return
+        
+        # A running agent holds the old master key
+        from src.agent import AgentClient
+        client = AgentClient()
+        if client.is_running(self.db_path):
+            client.call("lock")
+            print("Stopped the running agent; restart it with 'ldcm agent'.")
+        
+        self.vault.rekey(new_password)
+        print("✓ Master password changed.")
+    
+    def cmd_agent(self, args):
+        """Start, stop or query the background key agent"""
+        from src.agent import AgentClient, AgentError, KeyAgent
+        client = AgentClient()
+        running = client.is_running()
+        
+        if args.status:
+            if running:
+                info = client.call("ping")
+                print(f"Agent running (pid {info['pid']}) for {info['db_path']}")
+            else:
+                print("Agent not running.")
+            return
+        
+        if args.stop:
+            if running:
+                client.call("lock")
+                print("✓ Agent locked and stopped.")
+            else:
+                print("Agent not running.")
+            return
+        
+        if running:
+            print("Agent already running.")
+            return
+        if not self.unlock_vault():
+            return
+        
+        agent = KeyAgent(self.vault, idle_timeout=args.timeout * 60)
+        if args.foreground or not hasattr(os, "fork"):
+            print(f"✓ Agent listening on {agent.socket_path} (Ctrl+C to stop)")
+            try:
+                agent.serve()
+            except KeyboardInterrupt:
+                pass
+            except AgentError as e:
+                print(e)
+        elif agent.daemonize() is False:
+            self.vault.lock()
+            print(f"✓ Agent started. Locks after {args.timeout} idle minutes.")
+    
+    def cmd_migrate(self, args):
+        """Show or apply pending vault schema migrations"""
+        if not os.path.exists(self.db_path):
+            print("Vault not initialized. Run 'ldcm init' first.")
+            return
+        
+        from src.database import Database
+        migrator = Database(self.db_path, migrate=False).migrator
+        pending = migrator.pending()
+        
+        if args.status:
+            for version, name, applied_at in migrator.applied():
+                print(f"  {version:>3}  {name:<24} applied {applied_at or '(before tracking)'}")
+            for migration in pending:
+                print(f"  {migration.version:>3}  {migration.name:<24} pending")
+            return
+        
+        if not pending:
+            print(f"Vault schema is up to date (version {migrator.current_version()}).")
+            return
+        
+        for migration in pending:
+            print(f"  Applying {migration.version}: {migration.name}")
+        try:
+            backup_path = migrator.migrate(backup=not args.no_backup)
+        except ValueError as e:
+            print(e)
+            return
+        if backup_path:
+            print(f"  Backup written to {backup_path}")
+        print(f"✓ Vault migrated to version {migrator.current_version()}.")
+    
     def cmd_projects(self, args):
         """List all projects"""
         if not self.unlock_vault():
             return
         
-        projects = self.vault.get_projects()
+        projects = self.vault.get_project_tree(include_keys=args.keys)
         if not projects:
             print("No projects found. Create one with 'ldcm project add <name>'")
             return
@@ -62,16 +233,23 @@ class CLI:
         print("\nProjects:")
         print("-" * 40)
         for p in projects:
-            envs = self.vault.get_environments(p.id)
-            env_names = ", ".join([e.name for e in envs])
+            env_names = ", ".join([f"{e.name} ({e.secret_count})" for e in p.environments])
             print(f"  {p.id}. {p.name} [{env_names}]")
+            if args.keys:
+                for e in p.environments:
+                    if e.keys:
+                        print(f"      {e.name}: {', '.join(e.keys)}")
     
     def cmd_project_add(self, args):
         """Add a new project"""
         if not self.unlock_vault():
             return
         
-        project = self.vault.create_project(args.name)
+        try:
+            self.vault.create_project(args.name)
+        except ValueError as e:
+            print(e)
+            return
         print(f"✓ Project '{args.name}' created with environments: dev, staging, test")
     
     def cmd_project_delete(self, args):
@@ -87,53 +265,98 @@ class CLI:
         if not self.unlock_vault():
             return
         
-        projects = self.vault.get_projects()
-        project = next((p for p in projects if p.name == args.project), None)
-        
-        if not project:
-            print(f"Project '{args.project}' not found.")
-            return
-        
-        envs = self.vault.get_environments(project.id)
-        env = next((e for e in envs if e.name == args.env), None)
-        
+        env = self.vault.resolve(args.project, args.env)
         if not env:
-            print(f"Environment '{args.env}' not found.")
+            print(f"Environment '{args.project}/{args.env}' not found.")
             return
         
-        secrets = self.vault.get_secrets(env.id)
-        if not secrets:
+        # Rows are printed page by page as they are read, never the whole environment at once
+        listed = False
+        for page in self.vault.iter_secret_pages(env.id):
+            if not listed:
+                print(f"\nSecrets for {args.project}/{args.env}:")
+                print("-" * 50)
+                listed = True
+            values = self.decrypt_all(page) if args.reveal else {}
+            for s in page:
+                print(f"  {s.key}={values.get(s.key, '••••••••')}")
+        
+        if not listed:
             print(f"No secrets in {args.project}/{args.env}")
+    
+    def cmd_get(self, args):
+        """Print one secret's raw value (no trailing newline) for $(ldcm get ...)"""
+        if not self.unlock_vault():
+            sys.exit(1)
+        
+        try:
+            value = self.vault.get_secret_value(args.path, args.key)
+        except ValueError as e:
+            print(f"Could not decrypt '{args.key}': {e}", file=sys.stderr)
+            sys.exit(1)
+        if value is None:
+            print(f"Secret '{args.key}' not found in '{args.path}'.", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.write(value)
+        sys.stdout.flush()
+    
+    def cmd_search(self, args):
+        """Find which projects/environments define a key"""
+        if not self.unlock_vault():
             return
         
-        print(f"\nSecrets for {args.project}/{args.env}:")
-        print("-" * 50)
-        for s in secrets:
-            value = self.vault.decrypt_secret(s.encrypted_value) if args.reveal else "••••••••"
-            print(f"  {s.key}={value}")
+        hits = self.vault.search_keys(args.pattern, args.field, args.limit)
+        if not hits:
+            print(f"No keys match '{args.pattern}'")
+            return
+        
+        width = max(len(f"{h.project}/{h.environment}") for h in hits)
+        for h in hits:
+            print(f"  {h.project + '/' + h.environment:<{width}}  {h.key}")
+        if len(hits) == args.limit:
+            print(f"(first {args.limit} matches; use --limit for more)")
     
     def cmd_secret_add(self, args):
         """Add a secret"""
         if not self.unlock_vault():
             return
         
-        projects = self.vault.get_projects()
-        project = next((p for p in projects if p.name == args.project), None)
-        
-        if not project:
-            print(f"Project '{args.project}' not found.")
+        env = self.vault.resolve(args.project, args.env)
+        if not env:
+            print(f"Environment '{args.project}/{args.env}' not found.")
             return
         
-        envs = self.vault.get_environments(project.id)
-        env = next((e for e in envs if e.name == args.env), None)
+        value = args.value if args.value else getpass.getpass("Secret Value: ")
+        try:
+            self.vault.add_secret(env.id, args.key, value)
+        except ValueError as e:
+            print(e)
+            return
+        print(f"✓ Secret '{args.key}' added to {args.project}/{args.env}")
+    
+    def cmd_import(self, args):
+        """Import secrets from .env, docker env, JSON or YAML files"""
+        if not self.unlock_vault():
+            return
         
+        env = self.vault.resolve(args.project, args.env)
         if not env:
-            print(f"Environment '{args.env}' not found.")
+            print(f"Environment '{args.project}/{args.env}' not found.")
             return
         
-        value = args.value if args.value else getpass.getpass("Secret Value: ")
-        self.vault.add_secret(env.id, args.key, value)
-        print(f"✓ Secret '{args.key}' added to {args.project}/{args.env}")
+        from src.importer import read_secrets
+        
+        def items():
+            for path in args.files:
+                yield from read_secrets(path, args.format)
+        
+        try:
+            counts = self.vault.import_secrets(env.id, items(), args.on_conflict)
+        except (OSError, ValueError) as e:
+            print(e)
+            return
+        print(f"✓ Imported into {args.project}/{args.env}: "
+              f"{counts['added']} added, {counts['updated']} updated, {counts['skipped']} skipped")
     
     def cmd_secret_delete(self, args):
         """Delete a secret"""
@@ -146,56 +369,55 @@ class CLI:
     def cmd_inject(self, args):
         """Inject secrets into shell or command"""
         if not self.unlock_vault():
-            return
-        
-        projects = self.vault.get_projects()
-        project = next((p for p in projects if p.name == args.project), None)
-        
-        if not project:
-            print(f"Project '{args.project}' not found.")
-            return
-        
-        envs = self.vault.get_environments(project.id)
-        env = next((e for e in envs if e.name == args.env), None)
-        
-        if not env:
-            print(f"Environment '{args.env}' not found.")
-            return
-        
-        secrets = self.vault.get_secrets(env.id)
-        decrypted = {s.key: self.vault.decrypt_secret(s.encrypted_value) for s in secrets}
-        
-        if args.command:
-            result = InjectionEngine.run_with_secrets(decrypted, args.command, args.dir)
-            print(result.stdout)
-            if result.stderr:
-                print(result.stderr, file=sys.stderr)
-            sys.exit(result.returncode)
+            sys.exit(1)
+        
+        keys = self.key_filter(args)
+        secrets = self.vault.get_secrets_by_path(f"{args.project}/{args.env}", keys)
+        if secrets is None:
+            print(f"Environment '{args.project}/{args.env}' not found.", file=sys.stderr)
+            sys.exit(1)
+        
+        from src.injector import InjectionEngine
+        decrypted = self.decrypt_all(secrets, keys.strip if keys and args.strip_prefix else None)
+        
+        if args.shell_command:
+            if args.redact:
+                from src.redact import Redactor
+                returncode = InjectionEngine.run_piped(decrypted, args.shell_command, args.dir,
+                                                       redactor=Redactor(decrypted.values()))
+                InjectionEngine.exit_like(returncode)
+            if args.mode == "exec":
+                # Nothing of the CLI survives the exec: drop keys and database handles first
+                self.vault.lock()
+                self.vault.db.engine.dispose()
+                InjectionEngine.exec_with_secrets(decrypted, args.shell_command, args.dir)
+            if args.mode == "pipe":
+                returncode = InjectionEngine.run_piped(decrypted, args.shell_command, args.dir)
+            else:
+                returncode = InjectionEngine.run_inherit(decrypted, args.shell_command, args.dir)
+            InjectionEngine.exit_like(returncode)
         else:
             InjectionEngine.inject_shell(decrypted)
             print("✓ Terminal opened with injected secrets.")
     
     def cmd_export(self, args):
         """Export secrets to various formats"""
+        if args.all:
+            return self.export_all(args)
+        if not args.project or not args.env:
+            print("Specify <project> <env>, or --all.", file=sys.stderr)
+            sys.exit(1)
         if not self.unlock_vault():
-            return
-        
-        projects = self.vault.get_projects()
-        project = next((p for p in projects if p.name == args.project), None)
-        
-        if not project:
-            print(f"Project '{args.project}' not found.")
-            return
+            sys.exit(1)
         
-        envs = self.vault.get_environments(project.id)
-        env = next((e for e in envs if e.name == args.env), None)
+        keys = self.key_filter(args)
+        secrets = self.vault.get_secrets_by_path(f"{args.project}/{args.env}", keys)
+        if secrets is None:
+            print(f"Environment '{args.project}/{args.env}' not found.", file=sys.stderr)
+            sys.exit(1)
         
-        if not env:
-            print(f"Environment '{args.env}' not found.")
-            return
-        
-        secrets = self.vault.get_secrets(env.id)
-        decrypted = {s.key: self.vault.decrypt_secret(s.encrypted_value) for s in secrets}
+        from src.injector import InjectionEngine
+        decrypted = self.decrypt_all(secrets, keys.strip if keys and args.strip_prefix else None)
         
         if args.format == "env":
             if args.output:
@@ -209,11 +431,72 @@ class CLI:
             print(InjectionEngine.generate_powershell_export(decrypted))
         elif args.format == "docker":
             print(InjectionEngine.generate_docker_env(decrypted))
+    
+    def export_all(self, args):
+        """Export every project/environment in one pass"""
+        if not args.output:
+            print("--all needs --output <directory or .zip file>.", file=sys.stderr)
+            sys.exit(1)
+        if not self.unlock_vault():
+            sys.exit(1)
+        
+        from src.injector import InjectionEngine
+        keys = self.key_filter(args)
+        
+        def entries():
+            for project, env, key, result in self.vault.iter_all_secrets(keys=keys):
+                if result.ok:
+                    yield project, env, keys.strip(key) if keys and args.strip_prefix else key, result.value
+                else:
+                    print(f"Warning: could not decrypt '{project}/{env}/{key}': {result.error}", file=sys.stderr)
+        
+        counts = InjectionEngine.export_all(entries(), args.output, args.format)
+        print(f"✓ Exported {counts['secrets']} secrets from {counts['environments']} environments to {args.output}")
+    
+    def cmd_run(self, args):
+        """Run every command of a run file, each with its own project/env secrets"""
+        from src.runner import StackRunner, load_run_file
+        try:
+            services = load_run_file(args.file)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        if not self.unlock_vault():
+            sys.exit(1)
+        
+        # One query for all environments, one parallel decrypt batch for all their secrets
+        paths = list(dict.fromkeys(service.path for service in services))
+        found = self.vault.get_secrets_by_paths(paths)
+        missing = [path for path in paths if path not in found]
+        if missing:
+            print(f"Environment(s) not found: {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
+        secrets = [secret for path in paths for secret in found[path]]
+        environments = {path: {} for path in paths}
+        path_of = {secret.environment_id: path for path in paths for secret in found[path]}
+        for secret, result in zip(secrets, self.vault.decrypt_many(secrets)):
+            if result.ok:
+                environments[path_of[secret.environment_id]][secret.key] = result.value
+            else:
+                print(f"Warning: could not decrypt '{secret.key}': {result.error}", file=sys.stderr)
+        # The stack may run for hours: keep no keys or database handles while it does
+        self.vault.lock()
+        self.vault.db.engine.dispose()
+        
+        from src.injector import InjectionEngine
+        InjectionEngine.exit_like(StackRunner(services, environments, args.redact).run())
+
+
+def _add_key_filter_arguments(parser):
+    """--only/--exclude/--prefix/--strip-prefix, shared by commands that emit secrets"""
+    parser.add_argument("--only", action="append", metavar="KEY",
+                        help="Only this key or glob, e.g. 'DB_*' (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="KEY", help="Skip this key or glob (repeatable)")
+    parser.add_argument("--prefix", action="append", help="Only keys starting with this prefix (repeatable)")
+    parser.add_argument("--strip-prefix", action="store_true", help="Remove the matched --prefix from key names")
 
 
 def main():
-    cli = CLI()
-    
     parser = argparse.ArgumentParser(
         prog="ldcm",
         description="Local Developer Credentials Manager - Secure credential management for developers"
@@ -223,10 +506,32 @@ def main():
     subparsers = parser.add_subparsers(dest="command", help="Commands")
     
     # init
-    subparsers.add_parser("init", help="Initialize a new vault")
+    init_p = subparsers.add_parser("init", help="Initialize a new vault")
+    init_p.add_argument("--target-ms", type=int, default=KDF_TARGET_MS, help="Target unlock time in milliseconds")
+    
+    # kdf-tune
+    tune_p = subparsers.add_parser("kdf-tune", help="Re-calibrate key derivation cost for this host")
+    tune_p.add_argument("--target-ms", type=int, default=KDF_TARGET_MS, help="Target unlock time in milliseconds")
+    tune_p.add_argument("--dry-run", action="store_true", help="Only show the proposed parameters")
+    
+    # passwd
+    subparsers.add_parser("passwd", help="Change the master password")
+    
+    # agent
+    agent_p = subparsers.add_parser("agent", help="Keep the vault unlocked in a background agent")
+    agent_p.add_argument("--stop", action="store_true", help="Lock and stop the running agent")
+    agent_p.add_argument("--status", action="store_true", help="Show whether an agent is running")
+    agent_p.add_argument("--foreground", action="store_true", help="Serve in the foreground")
+    agent_p.add_argument("--timeout", type=int, default=AUTO_LOCK_MINUTES, help="Idle minutes before auto-lock")
+    
+    # migrate
+    migrate_p = subparsers.add_parser("migrate", help="Upgrade the vault file to the current schema")
+    migrate_p.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    migrate_p.add_argument("--no-backup", action="store_true", help="Skip the backup copy taken before migrating")
     
     # projects
-    subparsers.add_parser("projects", help="List all projects")
+    projects_p = subparsers.add_parser("projects", help="List all projects")
+    projects_p.add_argument("--keys", "-k", action="store_true", help="Also list secret key names")
     
     # project add
     p_add = subparsers.add_parser("project-add", help="Add a new project")
@@ -242,6 +547,18 @@ def main():
     secrets_p.add_argument("env", help="Environment (dev/staging/test)")
     secrets_p.add_argument("--reveal", "-r", action="store_true", help="Show secret values")
     
+    # get
+    get_p = subparsers.add_parser("get", help="Print one secret value (for scripts)")
+    get_p.add_argument("path", help="project/env")
+    get_p.add_argument("key", help="Secret key")
+    
+    # search
+    search_p = subparsers.add_parser("search", help="Find keys across all projects")
+    search_p.add_argument("pattern", help="Substring, or glob with * ? [ ] (e.g. 'STRIPE_*')")
+    search_p.add_argument("--in", dest="field", choices=SEARCH_FIELDS, default="key",
+                          help="Match key names (default), project or environment names, or any")
+    search_p.add_argument("--limit", "-n", type=int, default=SEARCH_LIMIT, help="Maximum matches to show")
+    
     # secret add
     s_add = subparsers.add_parser("secret-add", help="Add a secret")
     s_add.add_argument("project", help="Project name")
@@ -253,19 +570,42 @@ def main():
     s_del = subparsers.add_parser("secret-delete", help="Delete a secret")
     s_del.add_argument("id", type=int, help="Secret ID")
     
+    # import
+    import_p = subparsers.add_parser("import", help="Import secrets from files")
+    import_p.add_argument("project", help="Project name")
+    import_p.add_argument("env", help="Environment")
+    import_p.add_argument("files", nargs="+", help=".env, docker env, JSON or YAML files")
+    import_p.add_argument("--format", "-f", choices=IMPORT_FORMATS, help="File format (default: from extension)")
+    import_p.add_argument("--on-conflict", choices=CONFLICT_POLICIES, default="upsert",
+                          help="Existing keys: overwrite (upsert), keep (skip) or abort (fail)")
+    
     # inject
     inject_p = subparsers.add_parser("inject", help="Inject secrets into shell/command")
     inject_p.add_argument("project", help="Project name")
     inject_p.add_argument("env", help="Environment")
-    inject_p.add_argument("--command", "-c", help="Command to run with secrets")
+    inject_p.add_argument("--command", "-c", dest="shell_command", help="Command to run with secrets")
     inject_p.add_argument("--dir", "-d", help="Working directory")
+    inject_p.add_argument("--mode", "-m", choices=INJECT_MODES, default="exec",
+                          help="exec: replace ldcm with the command; inherit: run it on this terminal; "
+                               "pipe: stream its output through ldcm")
+    inject_p.add_argument("--redact", action="store_true",
+                          help="Mask secret values in the command's output (implies --mode pipe)")
+    _add_key_filter_arguments(inject_p)
     
     # export
     export_p = subparsers.add_parser("export", help="Export secrets")
-    export_p.add_argument("project", help="Project name")
-    export_p.add_argument("env", help="Environment")
+    export_p.add_argument("project", nargs="?", help="Project name")
+    export_p.add_argument("env", nargs="?", help="Environment")
+    export_p.add_argument("--all", "-a", action="store_true",
+                          help="Export every project/environment (one file each, or a .zip with --output x.zip)")
     export_p.add_argument("--format", "-f", choices=["env", "shell", "powershell", "docker"], default="env")
     export_p.add_argument("--output", "-o", help="Output file path")
+    _add_key_filter_arguments(export_p)
+    
+    # run
+    run_p = subparsers.add_parser("run", help="Run several commands, each with its own project/env secrets")
+    run_p.add_argument("--file", "-f", default=RUN_FILE, help=f"Run file (default: {RUN_FILE})")
+    run_p.add_argument("--redact", action="store_true", help="Mask secret values in the commands' output")
     
     args = parser.parse_args()
     
@@ -273,16 +613,25 @@ def main():
         parser.print_help()
         return
     
+    cli = CLI()
     commands = {
         "init": cli.cmd_init,
+        "kdf-tune": cli.cmd_kdf_tune,
+        "passwd": cli.cmd_passwd,
+        "agent": cli.cmd_agent,
+        "migrate": cli.cmd_migrate,
         "projects": cli.cmd_projects,
         "project-add": cli.cmd_project_add,
         "project-delete": cli.cmd_project_delete,
         "secrets": cli.cmd_secrets,
+        "get": cli.cmd_get,
+        "search": cli.cmd_search,
         "secret-add": cli.cmd_secret_add,
         "secret-delete": cli.cmd_secret_delete,
+        "import": cli.cmd_import,
         "inject": cli.cmd_inject,
         "export": cli.cmd_export,
+        "run": cli.cmd_run,
     }
     
     commands[args.command](args)
@@ -30,3 +30,44 @@ APP_NAME = "Local Developer Credentials Manager"
 APP_VERSION = "1.0.0"
 DB_NAME = "ldcm_vault.db"
 AUTO_LOCK_MINUTES = 5
+AGENT_SOCKET_NAME = "agent.sock"
+KDF_TARGET_MS = 250
+# AES-GCM implementation: "auto", "cryptography" (OpenSSL) or "pycryptodome"
+CRYPTO_BACKEND = "auto"
+# Decrypted-value cache (GUI only; 0 disables)
+DECRYPT_CACHE_SIZE = 1000
+DECRYPT_CACHE_TTL_SECONDS = 120
+# Applied to every SQLite connection (see src/database.py)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",      # readers never block the writer
+    "busy_timeout": 5000,       # ms to wait for a lock instead of failing
+    "synchronous": "NORMAL",    # safe with WAL, one fsync per checkpoint
+    "mmap_size": 268435456,     # 256 MiB memory-mapped reads
+    "cache_size": -16384,       # 16 MiB page cache (negative = KiB)
+}
+
+# `ldcm import` file formats, and how it treats keys that already exist in the environment
+IMPORT_FORMATS = ("env", "docker", "json", "yaml")
+CONFLICT_POLICIES = ("upsert", "skip", "fail")
+
+# Fields `ldcm search` can match; "any" matches all three
+SEARCH_FIELDS = ("key", "project", "environment", "any")
+SEARCH_LIMIT = 100
+
+# Secrets fetched per page when listing an environment (CLI streaming, GUI "Load more")
+SECRETS_PAGE_SIZE = 500
+
+# `ldcm inject --command` modes: replace the CLI process (exec), share its terminal (inherit),
+# or stream output through pipes (pipe), reading at most INJECT_PIPE_CHUNK bytes per stream at a time
+INJECT_MODES = ("exec", "inherit", "pipe")
+INJECT_PIPE_CHUNK = 65536
+
+# `ldcm inject --redact`: replacement for secret values in the command's output. Shorter values
+# (1, on, yes) are left alone: masking them would garble ordinary output and hide nothing; values
+# shorter than redact.SHORT_VALUE_LENGTH are only masked as whole words
+REDACT_MASK = "****"
+REDACT_MIN_LENGTH = 4
+
+# `ldcm run`: default stack file, and seconds stopped services get after SIGTERM before SIGKILL
+RUN_FILE = "ldcm-run.toml"
+RUN_STOP_TIMEOUT = 10
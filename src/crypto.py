@@ -1,57 +1,315 @@
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
-from Crypto.Protocol.KDF import PBKDF2
-from argon2 import PasswordHasher
+# argon2, pycryptodome and the thread pool are imported where they are used, so that
+# importing this module (e.g. for the agent client) stays cheap at CLI startup
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from src.config import CRYPTO_BACKEND
 import base64
 import os
+import time
+
+# Vault key formats stored in VaultSettings.kdf_version
+KDF_LEGACY = 1       # Argon2 password hash + separate PBKDF2 key derivation
+KDF_ARGON2ID = 2     # Single Argon2id derivation checked against a key-check value
+
+KEY_CHECK_PLAINTEXT = "ldcm-key-check"
+
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+# Batches smaller than this are decrypted inline; a thread pool costs more than it saves
+PARALLEL_BATCH_MIN = 64
+
+# Calibration bounds (memory in KiB); the floor follows OWASP's Argon2id minimum
+KDF_MIN_MEMORY_KIB = 19456
+KDF_MAX_MEMORY_KIB = 1048576
+
+
+class KdfParams(NamedTuple):
+    """Argon2id cost parameters stored per vault"""
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+    
+    @classmethod
+    def default(cls) -> "KdfParams":
+        from argon2 import PasswordHasher
+        ph = PasswordHasher()
+        return cls(ph.time_cost, ph.memory_cost, ph.parallelism)
+
+
+class CipherBackend(ABC):
+    """AES-256-GCM implementation; every backend produces nonce + tag + ciphertext"""
+    name = None
+    
+    @abstractmethod
+    def cipher(self, key: bytes):
+        """Return an object with encrypt(bytes) -> bytes and decrypt(bytes) -> bytes for key"""
+
+
+class _PyCryptodomeCipher:
+    def __init__(self, key: bytes):
+        from Crypto.Cipher import AES
+        self.key = key
+        self.aes = AES
+    
+    def encrypt(self, plaintext: bytes) -> bytes:
+        nonce = os.urandom(NONCE_SIZE)
+        cipher = self.aes.new(self.key, self.aes.MODE_GCM, nonce=nonce)
+        ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+        return b''.join((nonce, tag, ciphertext))
+    
+    def decrypt(self, encrypted) -> bytes:
+        # Slicing a memoryview references the stored blob instead of copying it
+        data = memoryview(encrypted)
+        nonce, tag, ciphertext = data[:NONCE_SIZE], data[NONCE_SIZE:NONCE_SIZE + TAG_SIZE], data[NONCE_SIZE + TAG_SIZE:]
+        cipher = self.aes.new(self.key, self.aes.MODE_GCM, nonce=nonce)
+        return cipher.decrypt_and_verify(ciphertext, tag)
+
+
+class PyCryptodomeBackend(CipherBackend):
+    name = "pycryptodome"
+    
+    def cipher(self, key: bytes):
+        return _PyCryptodomeCipher(key)
+
+
+class _CryptographyCipher:
+    def __init__(self, key: bytes):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        from cryptography.exceptions import InvalidTag
+        # AESGCM is stateless per call, so one instance serves every thread
+        self.aesgcm = AESGCM(key)
+        self.invalid_tag = InvalidTag
+    
+    def encrypt(self, plaintext: bytes) -> bytes:
+        nonce = os.urandom(NONCE_SIZE)
+        sealed = self.aesgcm.encrypt(nonce, plaintext, None)
+        # AESGCM appends the tag; LDCM stores it in front of the ciphertext
+        return b''.join((nonce, sealed[-TAG_SIZE:], sealed[:-TAG_SIZE]))
+    
+    def decrypt(self, encrypted) -> bytes:
+        data = memoryview(encrypted)
+        nonce = data[:NONCE_SIZE]
+        sealed = b''.join((data[NONCE_SIZE + TAG_SIZE:], data[NONCE_SIZE:NONCE_SIZE + TAG_SIZE]))
+        try:
+            return self.aesgcm.decrypt(bytes(nonce), sealed, None)
+        except self.invalid_tag:
+            raise ValueError("MAC check failed")
+
+
+class CryptographyBackend(CipherBackend):
+    """OpenSSL (AES-NI) via the optional `cryptography` package"""
+    name = "cryptography"
+    
+    def cipher(self, key: bytes):
+        return _CryptographyCipher(key)
+
+
+BACKENDS = {backend.name: backend for backend in (PyCryptodomeBackend, CryptographyBackend)}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name: str = None) -> CipherBackend:
+    """Backend by name; "auto" prefers `cryptography` when it is installed"""
+    name = name or CRYPTO_BACKEND
+    if name == "auto":
+        try:
+            import cryptography.hazmat.primitives.ciphers.aead  # noqa: F401
+            name = CryptographyBackend.name
+        except ImportError:
+            name = PyCryptodomeBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown crypto backend '{name}'")
+    return BACKENDS[name]()
+
+
+class DecryptResult(NamedTuple):
+    """Outcome of one item in a batch decryption"""
+    value: Optional[str]
+    error: Optional[Exception] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def calibrate_kdf(target_ms: int = 250, max_memory_kib: int = KDF_MAX_MEMORY_KIB) -> KdfParams:
+    """Benchmark this host and pick Argon2id parameters taking about target_ms"""
+    from argon2.low_level import Type, hash_secret_raw
+    parallelism = max(1, min(4, os.cpu_count() or 1))
+    salt = os.urandom(16)
+    
+    def measure(time_cost, memory_cost):
+        start = time.perf_counter()
+        hash_secret_raw(b'calibration', salt, time_cost=time_cost, memory_cost=memory_cost,
+                        parallelism=parallelism, hash_len=32, type=Type.ID)
+        return (time.perf_counter() - start) * 1000
+    
+    # Prefer memory hardness: double memory while a single pass fits twice in the budget
+    memory_cost = KDF_MIN_MEMORY_KIB
+    elapsed = measure(1, memory_cost)
+    while elapsed * 2 <= target_ms and memory_cost * 2 <= max_memory_kib:
+        memory_cost *= 2
+        elapsed = measure(1, memory_cost)
+    
+    # Spend the rest of the budget on passes
+    time_cost = max(1, int(target_ms // max(elapsed, 1)))
+    if memory_cost == KDF_MIN_MEMORY_KIB:
+        time_cost = max(2, time_cost)
+    return KdfParams(time_cost, memory_cost, parallelism)
+
 
 class CryptoEngine:
-    def __init__(self):
-        self.ph = PasswordHasher()
+    def __init__(self, backend: CipherBackend = None):
+        self._ph = None
+        self.backend = backend or get_backend()
         self._key = None
+        self._cipher = None
+    
+    @property
+    def ph(self):
+        """Argon2 password hasher for the legacy format"""
+        if self._ph is None:
+            from argon2 import PasswordHasher
+            self._ph = PasswordHasher()
+        return self._ph
+    
+    def _set_key(self, key: bytes) -> bytes:
+        self._key = key
+        self._cipher = self.backend.cipher(key)
+        return key
+    
+    def generate_salt(self) -> str:
+        """Random base64 salt for key derivation"""
+        return base64.b64encode(os.urandom(16)).decode('utf-8')
     
     def hash_password(self, password: str) -> tuple[str, str]:
-        """Hash password using Argon2, returns (hash, salt)"""
-        salt = base64.b64encode(get_random_bytes(16)).decode('utf-8')
+        """Hash password using Argon2, returns (hash, salt) (legacy format)"""
+        salt = base64.b64encode(os.urandom(16)).decode('utf-8')
         password_hash = self.ph.hash(password + salt)
         return password_hash, salt
     
     def verify_password(self, password: str, password_hash: str, salt: str) -> bool:
-        """Verify password against stored hash"""
+        """Verify password against stored hash (legacy format)"""
         try:
             self.ph.verify(password_hash, password + salt)
             return True
         except:
             return False
     
-    def derive_key(self, password: str, salt: str) -> bytes:
-        """Derive encryption key from password"""
+    def derive_key(self, password: str, salt: str, params: KdfParams = None) -> bytes:
+        """Derive encryption key from password with a single Argon2id pass"""
+        from argon2.low_level import Type, hash_secret_raw
+        params = params or KdfParams.default()
+        salt_bytes = base64.b64decode(salt.encode('utf-8'))
+        return self._set_key(hash_secret_raw(
+            password.encode('utf-8'),
+            salt_bytes,
+            time_cost=params.time_cost,
+            memory_cost=params.memory_cost,
+            parallelism=params.parallelism,
+            hash_len=32,
+            type=Type.ID
+        ))
+    
+    def derive_legacy_key(self, password: str, salt: str) -> bytes:
+        """Derive encryption key from password with PBKDF2 (legacy format)"""
+        from Crypto.Protocol.KDF import PBKDF2
         salt_bytes = base64.b64decode(salt.encode('utf-8'))
-        self._key = PBKDF2(password, salt_bytes, dkLen=32, count=100000)
-        return self._key
+        return self._set_key(PBKDF2(password, salt_bytes, dkLen=32, count=100000))
+    
+    def generate_data_key(self) -> bytes:
+        """Random 256-bit key for envelope encryption"""
+        return os.urandom(32)
     
-    def encrypt(self, plaintext: str) -> str:
-        """Encrypt plaintext using AES-GCM"""
+    def wrap_key(self, data_key: bytes) -> bytes:
+        """Encrypt a data key under this engine's key"""
         if not self._key:
             raise ValueError("Key not derived. Call derive_key first.")
-        nonce = get_random_bytes(12)
-        cipher = AES.new(self._key, AES.MODE_GCM, nonce=nonce)
-        ciphertext, tag = cipher.encrypt_and_digest(plaintext.encode('utf-8'))
-        encrypted = base64.b64encode(nonce + tag + ciphertext).decode('utf-8')
-        return encrypted
-    
-    def decrypt(self, encrypted: str) -> str:
-        """Decrypt ciphertext using AES-GCM"""
+        return self._cipher.encrypt(data_key)
+    
+    def unwrap_key(self, wrapped_key: bytes) -> bytes:
+        """Decrypt a data key wrapped by wrap_key"""
+        if not self._key:
+            raise ValueError("Key not derived. Call derive_key first.")
+        return self._cipher.decrypt(wrapped_key)
+    
+    def for_key(self, key: bytes) -> "CryptoEngine":
+        """New engine on the same backend, keyed with key (e.g. an unwrapped data key)"""
+        engine = CryptoEngine(self.backend)
+        engine._set_key(key)
+        return engine
+    
+    def create_key_check(self) -> bytes:
+        """Encrypt a known constant so the key can be verified on unlock"""
+        return self.encrypt(KEY_CHECK_PLAINTEXT)
+    
+    def verify_key_check(self, key_check: bytes) -> bool:
+        """Check the derived key against a stored key-check value"""
+        try:
+            return self.decrypt(key_check) == KEY_CHECK_PLAINTEXT
+        except (ValueError, KeyError, TypeError):
+            return False
+    
+    def encrypt(self, plaintext: str) -> bytes:
+        """Encrypt plaintext using AES-GCM, returns nonce + tag + ciphertext"""
+        if not self._key:
+            raise ValueError("Key not derived. Call derive_key first.")
+        return self._cipher.encrypt(plaintext.encode('utf-8'))
+    
+    def decrypt(self, encrypted: bytes) -> str:
+        """Decrypt nonce + tag + ciphertext using AES-GCM"""
+        if not self._key:
+            raise ValueError("Key not derived. Call derive_key first.")
+        return self._cipher.decrypt(encrypted).decode('utf-8')
+    
+    def _encrypt_chunk(self, chunk: list) -> list:
+        return [self._cipher.encrypt(plaintext.encode('utf-8')) for plaintext in chunk]
+    
+    def encrypt_batch(self, plaintexts: list, max_workers: int = None) -> list:
+        """Encrypt many values on a thread pool, returning ciphertexts in input order"""
+        if not self._key:
+            raise ValueError("Key not derived. Call derive_key first.")
+        plaintexts = list(plaintexts)
+        workers = max_workers or min(8, os.cpu_count() or 1)
+        if workers < 2 or len(plaintexts) < PARALLEL_BATCH_MIN:
+            return self._encrypt_chunk(plaintexts)
+        
+        size = -(-len(plaintexts) // workers)
+        chunks = [plaintexts[i:i + size] for i in range(0, len(plaintexts), size)]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return [c for chunk in pool.map(self._encrypt_chunk, chunks) for c in chunk]
+    
+    def _decrypt_chunk(self, chunk: list) -> list:
+        results = []
+        for encrypted in chunk:
+            try:
+                results.append(DecryptResult(self.decrypt(encrypted)))
+            except Exception as e:
+                results.append(DecryptResult(None, e))
+        return results
+    
+    def decrypt_batch(self, encrypted_values: list, max_workers: int = None) -> list:
+        """Decrypt many values on a thread pool, returning DecryptResults in input order"""
         if not self._key:
             raise ValueError("Key not derived. Call derive_key first.")
-        data = base64.b64decode(encrypted.encode('utf-8'))
-        nonce, tag, ciphertext = data[:12], data[12:28], data[28:]
-        cipher = AES.new(self._key, AES.MODE_GCM, nonce=nonce)
-        plaintext = cipher.decrypt_and_verify(ciphertext, tag)
-        return plaintext.decode('utf-8')
+        encrypted_values = list(encrypted_values)
+        workers = max_workers or min(8, os.cpu_count() or 1)
+        if workers < 2 or len(encrypted_values) < PARALLEL_BATCH_MIN:
+            return self._decrypt_chunk(encrypted_values)
+        
+        # One contiguous chunk per worker keeps executor overhead per batch, not per item
+        size = -(-len(encrypted_values) // workers)
+        chunks = [encrypted_values[i:i + size] for i in range(0, len(encrypted_values), size)]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return [r for chunk in pool.map(self._decrypt_chunk, chunks) for r in chunk]
     
     def clear_key(self):
         """Zero out the key from memory"""
         if self._key:
             self._key = b'\x00' * len(self._key)
             self._key = None
+        self._cipher = None
@@ -1,13 +1,16 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+from src.config import SQLITE_PRAGMAS
+from src.migrations import LATEST_VERSION, Migrator
 import os
 
 Base = declarative_base()
 
 class Project(Base):
     __tablename__ = 'projects'
+    __table_args__ = (Index('ix_projects_name', 'name', unique=True),)
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -15,18 +18,30 @@ class Project(Base):
 
 class Environment(Base):
     __tablename__ = 'environments'
+    __table_args__ = (Index('ix_environments_project_name', 'project_id', 'name', unique=True),)
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
     name = Column(String(100), nullable=False)
     project = relationship("Project", back_populates="environments")
     secrets = relationship("Secret", back_populates="environment", cascade="all, delete-orphan")
+    data_key = relationship("EnvironmentKey", back_populates="environment", uselist=False, cascade="all, delete-orphan")
+
+class EnvironmentKey(Base):
+    """Per-environment data key, stored wrapped (AES-GCM encrypted) by the master key"""
+    __tablename__ = 'environment_keys'
+    id = Column(Integer, primary_key=True)
+    environment_id = Column(Integer, ForeignKey('environments.id'), nullable=False, unique=True)
+    wrapped_key = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    environment = relationship("Environment", back_populates="data_key")
 
 class Secret(Base):
     __tablename__ = 'secrets'
+    __table_args__ = (Index('ix_secrets_environment_key', 'environment_id', 'key', unique=True),)
     id = Column(Integer, primary_key=True)
     environment_id = Column(Integer, ForeignKey('environments.id'), nullable=False)
     key = Column(String(255), nullable=False)
-    encrypted_value = Column(Text, nullable=False)
+    encrypted_value = Column(LargeBinary, nullable=False)  # nonce + tag + ciphertext
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, nullable=True)
     environment = relationship("Environment", back_populates="secrets")
@@ -36,14 +51,42 @@ class VaultSettings(Base):
     id = Column(Integer, primary_key=True)
     master_password_hash = Column(String(255), nullable=False)
     salt = Column(String(64), nullable=False)
+    kdf_version = Column(Integer, nullable=False, server_default='1')
+    key_check = Column(LargeBinary, nullable=True)
+    # Argon2id parameters; NULL means the library defaults at the time
+    kdf_time_cost = Column(Integer, nullable=True)
+    kdf_memory_cost = Column(Integer, nullable=True)
+    kdf_parallelism = Column(Integer, nullable=True)
+    # 1 once every secret is encrypted under an environment data key (checked at unlock until then)
+    envelope_complete = Column(Integer, nullable=False, server_default='0')
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class Database:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pragmas: dict = None, migrate: bool = True):
         self.db_path = db_path
+        self.pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
         self.engine = create_engine(f'sqlite:///{db_path}')
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        event.listen(self.engine, 'connect', self._configure_connection)
+        self.migrator = Migrator(self.engine, Base.metadata, db_path)
+        is_new = not os.path.exists(db_path) or os.path.getsize(db_path) == 0
+        if is_new:
+            # Steps also create what the models cannot express (e.g. the search index)
+            self.migrator.migrate(backup=False)
+        elif migrate and self.migrator.user_version() != LATEST_VERSION:
+            # An up-to-date vault needs no DDL; only outdated files pay for the migration check
+            self.migrator.migrate()
+        # Rows are handed out after their session closes; keep their loaded state on commit
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+    
+    def _configure_connection(self, dbapi_connection, connection_record):
+        """Apply the configured PRAGMAs to each new SQLite connection"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                if value is not None:
+                    cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
     
     def get_session(self):
         return self.Session()
@@ -6,7 +6,7 @@ import os
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon
-from src.config import COLORS, APP_NAME, APP_VERSION, DB_NAME
+from src.config import COLORS, APP_NAME, APP_VERSION, DB_NAME, DECRYPT_CACHE_SIZE
 from src.vault import VaultManager
 from src.gui.styles import get_global_styles
 from src.gui.screens.unlock import UnlockScreen
@@ -37,7 +37,7 @@ class LDCMApp(QMainWindow):
         # Initialize vault
         db_path = os.path.join(os.path.expanduser("~"), ".ldcm", DB_NAME)
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.vault = VaultManager(db_path)
+        self.vault = VaultManager(db_path, cache_size=DECRYPT_CACHE_SIZE)
         
         # Central widget
         self.central_widget = QWidget()
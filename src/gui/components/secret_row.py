@@ -98,7 +98,7 @@ class SecretRow(QFrame):
             self.value_label.setText("••••••••")
             self.revealed = False
         else:
-            decrypted = self.vault.decrypt_secret(self.secret.encrypted_value)
+            decrypted = self.vault.decrypt_secret(self.secret)
             self.value_label.setText(decrypted)
             self.revealed = True
     
@@ -107,5 +107,5 @@ class SecretRow(QFrame):
     
     def copy_secret(self):
         import pyperclip
-        decrypted = self.vault.decrypt_secret(self.secret.encrypted_value)
+        decrypted = self.vault.decrypt_secret(self.secret)
         pyperclip.copy(decrypted)
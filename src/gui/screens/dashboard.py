@@ -2,7 +2,7 @@
 Main dashboard screen
 """
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QPushButton, QFrame, QStyle)
+                             QPushButton, QFrame, QStyle, QMessageBox)
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QFont
 from src.gui.styles import button_style, frame_style
@@ -11,6 +11,7 @@ from src.gui.components.sidebar import Sidebar
 from src.gui.components.secret_row import SecretRow
 from src.gui.components.dialogs import AddProjectDialog, AddSecretDialog, EditSecretDialog, InjectDialog
 from src.injector import InjectionEngine
+from src.config import SECRETS_PAGE_SIZE
 import pyperclip
 
 
@@ -68,7 +69,7 @@ class DashboardScreen(QWidget):
     
     def load_projects(self):
         """Load projects into sidebar"""
-        projects = self.vault.get_projects()
+        projects = self.vault.get_project_tree()
         self.sidebar.load_projects(projects)
     
     def show_welcome(self):
@@ -128,7 +129,8 @@ class DashboardScreen(QWidget):
         env_layout = QHBoxLayout()
         env_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
         
-        envs = self.vault.get_environments(self.selected_project.id)
+        # Environments come with the project tree; no query per selection
+        envs = self.selected_project.environments
         self.env_buttons = {}
         
         for env in envs:
@@ -271,20 +273,45 @@ class DashboardScreen(QWidget):
         
         table_layout.addWidget(header)
         
-        # Secrets rows
-        secrets = self.vault.get_secrets(self.selected_env.id)
+        table_layout.addStretch()
+        self.secrets_layout = table_layout
+        self.load_more_btn = None
+        
+        # Secrets rows, one page at a time
+        secrets = self.vault.get_secrets_page(self.selected_env.id)
         if not secrets:
             empty = QLabel("No secrets yet. Click '+ Add Secret' to create one.")
             empty.setStyleSheet(f"color: {self.colors['text_secondary']}; padding: 20px; background: transparent; border: none;")
             empty.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            table_layout.addWidget(empty)
+            table_layout.insertWidget(table_layout.count() - 1, empty)
         else:
-            for secret in secrets:
-                row = SecretRow(self.colors, secret, self.vault, self.delete_secret, self.edit_secret)
-                table_layout.addWidget(row)
+            self.add_secret_rows(secrets)
         
-        table_layout.addStretch()
         self.main_layout.addWidget(table, 1)
+    
+    def add_secret_rows(self, secrets):
+        """Append a page of rows, with a "Load more" button while pages remain"""
+        if self.load_more_btn:
+            self.load_more_btn.deleteLater()
+            self.load_more_btn = None
+        
+        for secret in secrets:
+            row = SecretRow(self.colors, secret, self.vault, self.delete_secret, self.edit_secret)
+            self.secrets_layout.insertWidget(self.secrets_layout.count() - 1, row)
+        
+        if len(secrets) == SECRETS_PAGE_SIZE:
+            last_key = secrets[-1].key
+            self.load_more_btn = QPushButton("Load more")
+            self.load_more_btn.setFixedHeight(36)
+            self.load_more_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+            self.load_more_btn.setStyleSheet(button_style(
+                self.colors['secondary'],
+                self.colors['primary']
+            ))
+            self.load_more_btn.clicked.connect(
+                lambda: self.add_secret_rows(self.vault.get_secrets_page(self.selected_env.id, last_key))
+            )
+            self.secrets_layout.insertWidget(self.secrets_layout.count() - 1, self.load_more_btn)
 
     # Dialog methods
     def add_project_dialog(self):
@@ -293,7 +320,11 @@ class DashboardScreen(QWidget):
         if dialog.exec():
             name = dialog.get_result()
             if name:
-                self.vault.create_project(name)
+                try:
+                    self.vault.create_project(name)
+                except ValueError as e:
+                    QMessageBox.warning(self, "Add Project", str(e))
+                    return
                 self.load_projects()
     
     def delete_project(self):
@@ -310,7 +341,11 @@ class DashboardScreen(QWidget):
         if dialog.exec():
             key, value = dialog.get_result()
             if key and value:
-                self.vault.add_secret(self.selected_env.id, key, value)
+                try:
+                    self.vault.add_secret(self.selected_env.id, key, value)
+                except ValueError as e:
+                    QMessageBox.warning(self, "Add Secret", str(e))
+                    return
                 self.show_project_view()
     
     def delete_secret(self, secret_id):
@@ -320,18 +355,23 @@ class DashboardScreen(QWidget):
     
     def edit_secret(self, secret):
         """Show edit secret dialog"""
-        decrypted_value = self.vault.decrypt_secret(secret.encrypted_value)
+        decrypted_value = self.vault.decrypt_secret(secret)
         dialog = EditSecretDialog(self, self.colors, secret, decrypted_value)
         if dialog.exec():
             key, value = dialog.get_result()
             if key and value:
-                self.vault.update_secret(secret.id, key, value)
+                try:
+                    self.vault.update_secret(secret.id, key, value)
+                except ValueError as e:
+                    QMessageBox.warning(self, "Edit Secret", str(e))
+                    return
                 self.show_project_view()
     
     def get_decrypted_secrets(self):
         """Get all secrets decrypted"""
         secrets = self.vault.get_secrets(self.selected_env.id)
-        return {s.key: self.vault.decrypt_secret(s.encrypted_value) for s in secrets}
+        results = self.vault.decrypt_many(secrets)
+        return {s.key: r.value for s, r in zip(secrets, results) if r.ok}
     
     def copy_as_env(self):
         """Copy secrets as ENV format"""
@@ -0,0 +1,97 @@
+"""
+Readers for importing secrets from .env, docker env, JSON and YAML files
+"""
+import json
+import os
+from typing import Iterator, Tuple
+
+
+def detect_format(path: str) -> str:
+    """Guess the format from the file extension; anything unknown is read as .env"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        return "json"
+    if ext in (".yaml", ".yml"):
+        return "yaml"
+    return "env"
+
+
+def _to_value(key: str, value) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"Value of '{key}' is nested; only flat key/value files can be imported")
+    if isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    raise ValueError(f"Value of '{key}' has unsupported type {type(value).__name__}")
+
+
+def read_env(path: str) -> Iterator[Tuple[str, str]]:
+    """.env syntax (quotes, escapes, export prefix) via python-dotenv; no ${VAR} expansion"""
+    from dotenv import dotenv_values
+    with open(path, encoding="utf-8") as f:
+        for key, value in dotenv_values(stream=f, interpolate=False).items():
+            # A bare KEY line has no value to store
+            if value is not None:
+                yield key, value
+
+
+def read_docker(path: str) -> Iterator[Tuple[str, str]]:
+    """docker --env-file syntax: values are literal, a bare KEY takes the value from the current environment"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            key, sep, value = line.partition("=")
+            key = key.strip()
+            if sep:
+                yield key, value
+            elif key in os.environ:
+                yield key, os.environ[key]
+
+
+def read_json(path: str) -> Iterator[Tuple[str, str]]:
+    """Flat JSON object; non-string scalars are stored in their JSON form"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a JSON object of key/value pairs")
+    for key, value in data.items():
+        yield key, _to_value(key, value)
+
+
+def read_yaml(path: str) -> Iterator[Tuple[str, str]]:
+    """Flat YAML mapping (needs the optional PyYAML package); values are imported exactly as written"""
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("Importing YAML requires PyYAML (pip install pyyaml)")
+    with open(path, encoding="utf-8") as f:
+        try:
+            # BaseLoader keeps every scalar a string: no 0123 -> 83, 1.10 -> 1.1, on/NO -> booleans, dates
+            data = yaml.load(f, Loader=yaml.BaseLoader) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path}: invalid YAML: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a YAML mapping of key/value pairs")
+    for key, value in data.items():
+        yield str(key), _to_value(str(key), value)
+
+
+READERS = {
+    "env": read_env,
+    "docker": read_docker,
+    "json": read_json,
+    "yaml": read_yaml,
+}
+
+
+def read_secrets(path: str, fmt: str = None) -> Iterator[Tuple[str, str]]:
+    """Yield (key, value) pairs from path in the given or detected format"""
+    fmt = fmt or detect_format(path)
+    if fmt not in READERS:
+        raise ValueError(f"Unknown import format '{fmt}'")
+    return READERS[fmt](path)
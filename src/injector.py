@@ -1,7 +1,120 @@
 import subprocess
+import hashlib
+import io
 import os
+import re
+import signal
+import sys
 import tempfile
-from typing import Dict
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+from src.config import INJECT_PIPE_CHUNK
+from src.redact import RedactingStream, Redactor
+
+# File extension per export format, for whole-vault exports
+EXPORT_EXTENSIONS = {
+    "env": ".env",
+    "shell": ".cmd",
+    "powershell": ".ps1",
+    "docker": ".yml",
+}
+
+
+def _open_private(path: str, binary: bool = False):
+    """Create (or truncate) a file readable by the owner only"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    return os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')
+
+
+def _safe_name(name: str) -> str:
+    """Project/environment name usable as a single path component"""
+    name = re.sub(r'[^\w.-]', '_', name)
+    return '_' + name if name.startswith('.') else name
+
+
+def _unique_name(name: str, used: set) -> str:
+    """_safe_name made unique among used (compared case-insensitively, as on Windows/macOS file systems);
+    a changed or clashing name gets a suffix derived from the original, so "a b" and "a_b" stay apart"""
+    safe = _safe_name(name)
+    if safe != name or safe.lower() in used:
+        safe = f"{safe}-{hashlib.sha256(name.encode('utf-8')).hexdigest()[:8]}"
+    candidate, n = safe, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{safe}-{n}"
+    used.add(candidate.lower())
+    return candidate
+
+
+# Passed on to a running child. SIGINT/SIGQUIT from the terminal already reach the child (same
+# foreground process group), so while it runs the CLI ignores them and lets the child decide
+FORWARDED_SIGNALS = ("SIGTERM", "SIGHUP")
+TERMINAL_SIGNALS = ("SIGINT", "SIGQUIT")
+
+
+@contextmanager
+def _forward_signals(process: subprocess.Popen):
+    """Relay termination signals to process for the duration of the block (main thread only)"""
+    previous = {}
+    if threading.current_thread() is threading.main_thread():
+        for name in FORWARDED_SIGNALS + TERMINAL_SIGNALS:
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            if name in FORWARDED_SIGNALS:
+                previous[signum] = signal.signal(signum, lambda received, frame: process.send_signal(received))
+            else:
+                previous[signum] = signal.signal(signum, signal.SIG_IGN)
+    try:
+        yield
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+def _pump(source, dest, chunk_size: int):
+    """Copy a child's output to dest as it arrives, holding at most chunk_size bytes"""
+    try:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            dest.write(chunk)
+            dest.flush()
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`); closing our end lets the child see EPIPE too
+        pass
+    finally:
+        source.close()
+
+
+class PipedCommand:
+    """A started command whose stdout/stderr are copied to binary streams by background threads"""
+    
+    def __init__(self, process: subprocess.Popen, stdout, stderr, chunk_size: int, redactor: Redactor = None):
+        self.process = process
+        if redactor:
+            stdout = RedactingStream(stdout, redactor)
+            stderr = RedactingStream(stderr, redactor)
+        self._redacting = redactor is not None
+        self._streams = (stdout, stderr)
+        self._pumps = [
+            threading.Thread(target=_pump, args=(process.stdout, stdout, chunk_size), daemon=True),
+            threading.Thread(target=_pump, args=(process.stderr, stderr, chunk_size), daemon=True),
+        ]
+        for pump in self._pumps:
+            pump.start()
+    
+    def wait(self) -> int:
+        """Wait until the output is drained and the command has exited; returns its exit code"""
+        for pump in self._pumps:
+            pump.join()
+        if self._redacting:
+            # Write out the tails held back in case a value continued
+            for stream in self._streams:
+                stream.close()
+        return self.process.wait()
+
 
 class InjectionEngine:
     """Handles credential injection into various targets"""
@@ -74,9 +187,66 @@ class InjectionEngine:
         """Generate PowerShell export commands"""
         return '\n'.join([f'$env:{key}="{value}"' for key, value in secrets.items()])
     
+    @staticmethod
+    def format_line(key: str, value: str, fmt: str = "env") -> str:
+        """One secret in an export format (same output as the generate_* helpers)"""
+        if fmt == "shell":
+            return f'set {key}={value}'
+        if fmt == "powershell":
+            return f'$env:{key}="{value}"'
+        if fmt == "docker":
+            return f'      - {key}={value}'
+        return f'{key}={value}'
+    
+    @staticmethod
+    def export_all(entries: Iterable[Tuple[str, str, str, str]], output_path: str, fmt: str = "env") -> dict:
+        """Stream (project, env, key, value) entries grouped by project/env into one file per
+        environment under output_path, or into a single archive when output_path ends in .zip"""
+        ext = EXPORT_EXTENSIONS[fmt]
+        archive = archive_file = None
+        if output_path.endswith('.zip'):
+            archive_file = _open_private(output_path, binary=True)
+            archive = zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            os.makedirs(output_path, mode=0o700, exist_ok=True)
+        
+        counts = {"environments": 0, "secrets": 0}
+        current = None
+        out = None
+        project_dirs = {}  # project name -> (directory name, env file names used in it)
+        used_projects = set()
+        try:
+            for project, env, key, value in entries:
+                if (project, env) != current:
+                    # Entries arrive ordered by project/env, so each file is written once, start to end
+                    if out:
+                        out.close()
+                    current = (project, env)
+                    if project not in project_dirs:
+                        project_dirs[project] = (_unique_name(project, used_projects), set())
+                    project_dir, used_envs = project_dirs[project]
+                    name = os.path.join(project_dir, _unique_name(env, used_envs) + ext)
+                    if archive:
+                        info = zipfile.ZipInfo(name.replace(os.sep, '/'), time.localtime()[:6])
+                        info.compress_type = zipfile.ZIP_DEFLATED
+                        out = io.TextIOWrapper(archive.open(info, 'w', force_zip64=True), encoding='utf-8')
+                    else:
+                        os.makedirs(os.path.join(output_path, project_dir), mode=0o700, exist_ok=True)
+                        out = _open_private(os.path.join(output_path, name))
+                    counts["environments"] += 1
+                out.write(InjectionEngine.format_line(key, value, fmt) + '\n')
+                counts["secrets"] += 1
+        finally:
+            if out:
+                out.close()
+            if archive:
+                archive.close()
+                archive_file.close()
+        return counts
+    
     @staticmethod
     def run_with_secrets(secrets: Dict[str, str], command: str, working_dir: str = None):
-        """Run a command with injected secrets"""
+        """Run a command with injected secrets, capturing its output in memory"""
         env = os.environ.copy()
         env.update(secrets)
         
@@ -89,3 +259,68 @@ class InjectionEngine:
             text=True
         )
         return result
+    
+    @staticmethod
+    def _environ(secrets: Dict[str, str]) -> dict:
+        env = os.environ.copy()
+        env.update(secrets)
+        return env
+    
+    @staticmethod
+    def exec_with_secrets(secrets: Dict[str, str], command: str, working_dir: str = None):
+        """Replace the current process with the command (via /bin/sh, like the other modes); does not return.
+        Windows has no exec, so there the command runs with inherited stdio and its exit code becomes ours"""
+        if os.name == 'nt':
+            InjectionEngine.exit_like(InjectionEngine.run_inherit(secrets, command, working_dir))
+        env = InjectionEngine._environ(secrets)
+        if working_dir:
+            os.chdir(working_dir)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvpe('/bin/sh', ['/bin/sh', '-c', command], env)
+    
+    @staticmethod
+    def run_inherit(secrets: Dict[str, str], command: str, working_dir: str = None) -> int:
+        """Run a command with injected secrets on our own stdin/stdout/stderr;
+        returns its exit code (negative when killed by that signal)"""
+        sys.stdout.flush()
+        sys.stderr.flush()
+        process = subprocess.Popen(command, shell=True, env=InjectionEngine._environ(secrets), cwd=working_dir)
+        with _forward_signals(process):
+            return process.wait()
+    
+    @staticmethod
+    def run_piped(secrets: Dict[str, str], command: str, working_dir: str = None,
+                  stdout=None, stderr=None, chunk_size: int = INJECT_PIPE_CHUNK, redactor: Redactor = None) -> int:
+        """Run a command with injected secrets, streaming its stdout/stderr through pipes to binary
+        streams (default: ours) in chunks of at most chunk_size bytes; returns its exit code.
+        With a redactor, secret values in the output are masked on the way through"""
+        piped = InjectionEngine.start_piped(secrets, command, working_dir, stdout, stderr, chunk_size, redactor)
+        with _forward_signals(piped.process):
+            return piped.wait()
+    
+    @staticmethod
+    def start_piped(secrets: Dict[str, str], command: str, working_dir: str = None, stdout=None, stderr=None,
+                    chunk_size: int = INJECT_PIPE_CHUNK, redactor: Redactor = None,
+                    detach: bool = False) -> PipedCommand:
+        """Start a command for run_piped without waiting for it. detach gives it its own session
+        (process group) and no stdin, for callers that supervise and signal it as a group"""
+        sys.stdout.flush()
+        sys.stderr.flush()
+        process = subprocess.Popen(command, shell=True, env=InjectionEngine._environ(secrets), cwd=working_dir,
+                                   stdin=subprocess.DEVNULL if detach else None, start_new_session=detach,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        return PipedCommand(process, stdout or sys.stdout.buffer, stderr or sys.stderr.buffer, chunk_size, redactor)
+    
+    @staticmethod
+    def exit_like(returncode: int):
+        """Exit the current process the way a child did: same code, or the same signal when it was killed"""
+        if returncode < 0 and os.name != 'nt':
+            signum = -returncode
+            sys.stdout.flush()
+            sys.stderr.flush()
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+            # Still here if the signal is blocked: use the shell's convention
+            returncode = 128 + signum
+        sys.exit(returncode)
@@ -0,0 +1,282 @@
+"""
+Versioned schema migrations for vault files
+
+Applied steps are recorded in the schema_migrations table (mirrored in
+PRAGMA user_version for a cheap check on open). Each step runs in its own
+transaction together with its schema_migrations row, and steps are written
+to be safe to re-run, so an interrupted upgrade resumes where it stopped.
+Processes opening the same outdated vault take turns through a lock file
+next to it; whoever comes second finds nothing pending.
+"""
+import base64
+import itertools
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, NamedTuple
+from sqlalchemy import inspect, text
+
+# Rows rewritten per round trip by data migrations, bounding memory on large vaults
+MIGRATION_BATCH_SIZE = 1000
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on path (created if missing), waiting for other processes to release it"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    # Gives up with OSError after about 10 seconds; a large upgrade can take longer
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock; the file stays for the next upgrade
+        os.close(fd)
+
+
+class Migration(NamedTuple):
+    """One ordered schema step; apply(conn, metadata) runs inside a transaction"""
+    version: int
+    name: str
+    apply: Callable
+
+
+def _baseline(conn, metadata):
+    """Tables as created by the first release; nothing to change"""
+
+
+def _convert_base64_column(conn, table: str, column: str):
+    """Decode base64 text values to raw blobs in id-keyset batches to bound memory"""
+    select = text(f"SELECT id, {column} FROM {table} WHERE id > :last AND typeof({column}) = 'text' "
+                  'ORDER BY id LIMIT :limit')
+    update = text(f'UPDATE {table} SET {column} = :value WHERE id = :id')
+    last = 0
+    while True:
+        rows = conn.execute(select, {'last': last, 'limit': MIGRATION_BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        last = rows[-1][0]
+        conn.execute(update, [{'id': row_id, 'value': base64.b64decode(value)} for row_id, value in rows])
+
+
+def _binary_ciphertext(conn, metadata):
+    """Store ciphertext as raw bytes instead of base64 text"""
+    _convert_base64_column(conn, 'secrets', 'encrypted_value')
+    _convert_base64_column(conn, 'vault_settings', 'key_check')
+
+
+def _unique_names(conn, metadata):
+    """Lookup indexes, unique project/environment/key names"""
+    # Duplicate keys: keep the most recently added value
+    conn.execute(text(
+        'DELETE FROM secrets WHERE id NOT IN '
+        '(SELECT MAX(id) FROM secrets GROUP BY environment_id, key)'
+    ))
+    # Duplicate names: keep the first, rename the rest so no data is lost
+    conn.execute(text(
+        "UPDATE environments SET name = name || '-' || id WHERE id NOT IN "
+        '(SELECT MIN(id) FROM environments GROUP BY project_id, name)'
+    ))
+    conn.execute(text(
+        "UPDATE projects SET name = name || ' (' || id || ')' WHERE id NOT IN "
+        '(SELECT MIN(id) FROM projects GROUP BY name)'
+    ))
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def fts5_trigram_available(conn) -> bool:
+    """SQLite 3.34+ built with FTS5 supports the trigram tokenizer"""
+    try:
+        conn.execute(text("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')"))
+        conn.execute(text('DROP TABLE temp.fts5_probe'))
+        return True
+    except Exception:
+        return False
+
+
+# Keeps secret_search in step with secrets and with project/environment renames
+SEARCH_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS secret_search_insert AFTER INSERT ON secrets BEGIN
+        INSERT INTO secret_search (rowid, key, project, environment)
+        SELECT new.id, new.key, p.name, e.name FROM environments e JOIN projects p ON p.id = e.project_id
+        WHERE e.id = new.environment_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS secret_search_delete AFTER DELETE ON secrets BEGIN
+        DELETE FROM secret_search WHERE rowid = old.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS secret_search_update AFTER UPDATE OF key, environment_id ON secrets BEGIN
+        DELETE FROM secret_search WHERE rowid = old.id;
+        INSERT INTO secret_search (rowid, key, project, environment)
+        SELECT new.id, new.key, p.name, e.name FROM environments e JOIN projects p ON p.id = e.project_id
+        WHERE e.id = new.environment_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS secret_search_environment AFTER UPDATE OF name ON environments BEGIN
+        UPDATE secret_search SET environment = new.name
+        WHERE rowid IN (SELECT id FROM secrets WHERE environment_id = new.id);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS secret_search_project AFTER UPDATE OF name ON projects BEGIN
+        UPDATE secret_search SET project = new.name
+        WHERE rowid IN (SELECT s.id FROM secrets s JOIN environments e ON e.id = s.environment_id
+                        WHERE e.project_id = new.id);
+    END''',
+)
+
+
+def _key_search_index(conn, metadata):
+    """Trigram full-text index over secret keys, project and environment names"""
+    if not fts5_trigram_available(conn):
+        # search_keys falls back to LIKE/GLOB over the tables
+        return
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS secret_search USING fts5(key, project, environment, tokenize='trigram')"
+    ))
+    conn.execute(text('DELETE FROM secret_search'))
+    conn.execute(text(
+        'INSERT INTO secret_search (rowid, key, project, environment) '
+        'SELECT s.id, s.key, p.name, e.name FROM secrets s '
+        'JOIN environments e ON e.id = s.environment_id JOIN projects p ON p.id = e.project_id'
+    ))
+    for trigger in SEARCH_TRIGGERS:
+        conn.execute(text(trigger))
+
+
+def _envelope_flag(conn, metadata):
+    """vault_settings.envelope_complete (added by _sync_tables); the next unlock verifies and sets it"""
+
+
+# Append new steps at the end; never renumber or edit released ones
+MIGRATIONS = [
+    Migration(1, 'baseline', _baseline),
+    Migration(2, 'binary_ciphertext', _binary_ciphertext),
+    Migration(3, 'unique_names', _unique_names),
+    Migration(4, 'key_search_index', _key_search_index),
+    Migration(5, 'envelope_flag', _envelope_flag),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+class Migrator:
+    """Applies pending MIGRATIONS to one vault file"""
+    
+    def __init__(self, engine, metadata, db_path: str):
+        self.engine = engine
+        self.metadata = metadata
+        self.db_path = db_path
+    
+    def user_version(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(text('PRAGMA user_version')).scalar()
+    
+    def _ensure_table(self, conn):
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations '
+            '(version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, applied_at DATETIME)'
+        ))
+        if conn.execute(text('SELECT COUNT(*) FROM schema_migrations')).scalar():
+            return
+        # Vaults upgraded before this table existed only recorded PRAGMA user_version
+        user_version = conn.execute(text('PRAGMA user_version')).scalar()
+        for migration in MIGRATIONS:
+            if migration.version <= user_version:
+                conn.execute(text('INSERT INTO schema_migrations (version, name) VALUES (:version, :name)'),
+                             {'version': migration.version, 'name': migration.name})
+    
+    def _record(self, conn, migration: Migration):
+        conn.execute(text('INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :at)'),
+                     {'version': migration.version, 'name': migration.name, 'at': datetime.utcnow()})
+        conn.execute(text(f'PRAGMA user_version = {int(migration.version)}'))
+    
+    def applied(self) -> list:
+        """(version, name, applied_at) rows; applied_at is None for steps that predate tracking.
+        Read-only: a vault without schema_migrations is described from PRAGMA user_version"""
+        with self.engine.connect() as conn:
+            tracked = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"
+            )).first()
+            rows = tracked and conn.execute(text(
+                'SELECT version, name, applied_at FROM schema_migrations ORDER BY version'
+            )).all()
+            if rows:
+                return rows
+            user_version = conn.execute(text('PRAGMA user_version')).scalar()
+        return [(migration.version, migration.name, None) for migration in MIGRATIONS
+                if migration.version <= user_version]
+    
+    def current_version(self) -> int:
+        applied = self.applied()
+        return applied[-1][0] if applied else 0
+    
+    def pending(self) -> list:
+        done = {row.version for row in self.applied()}
+        return [migration for migration in MIGRATIONS if migration.version not in done]
+    
+    def backup(self) -> str:
+        """Copy the vault with SQLite's online backup API to an owner-only file next to it"""
+        stem = f"{self.db_path}.v{self.current_version()}-{time.strftime('%Y%m%d%H%M%S')}"
+        for attempt in itertools.count(1):
+            # A second backup within the same second gets a -2, -3, ... suffix
+            path = f"{stem}.bak" if attempt == 1 else f"{stem}-{attempt}.bak"
+            try:
+                os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+                break
+            except FileExistsError:
+                continue
+        raw = self.engine.raw_connection()
+        try:
+            dest = sqlite3.connect(path)
+            try:
+                raw.driver_connection.backup(dest)
+            finally:
+                dest.close()
+        finally:
+            raw.close()
+        return path
+    
+    def _sync_tables(self):
+        """Create missing tables and add columns introduced after a vault file was created"""
+        self.metadata.create_all(self.engine)
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in self.metadata.sorted_tables:
+                existing = {c['name'] for c in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(self.engine.dialect)}'
+                    if not column.nullable:
+                        ddl += ' NOT NULL'
+                    if column.server_default is not None:
+                        ddl += f" DEFAULT '{column.server_default.arg}'"
+                    conn.execute(text(ddl))
+    
+    def migrate(self, backup: bool = True):
+        """Apply pending steps in order; returns the backup path (None if nothing was pending or backup is off)"""
+        with _file_lock(f"{self.db_path}.migrate.lock"):
+            # Read under the lock: another process may have just finished the upgrade
+            if self.current_version() > LATEST_VERSION:
+                raise ValueError("Vault was created by a newer version of LDCM")
+            pending = self.pending()
+            if not pending:
+                return None
+            backup_path = self.backup() if backup else None
+            with self.engine.begin() as conn:
+                self._ensure_table(conn)
+            self._sync_tables()
+            for migration in pending:
+                with self.engine.begin() as conn:
+                    migration.apply(conn, self.metadata)
+                    self._record(conn, migration)
+        return backup_path
@@ -0,0 +1,257 @@
+"""
+Streaming redaction of secret values in process output
+"""
+import codecs
+import heapq
+import re
+from itertools import compress
+from src.config import REDACT_MASK, REDACT_MIN_LENGTH
+
+# q-gram prefilter: an occurrence of a value at least 2k-1 long contains one of the text's k-grams
+# at offsets 0, k, 2k, ..., so only windows around grams that occur in some value need the matcher.
+# Slicing and set lookups run in C; below PREFILTER_GRAM_MIN too many ordinary grams would hit
+PREFILTER_GRAM_MAX = 16
+PREFILTER_GRAM_MIN = 4
+# Values too short for the prefilter are scanned separately, and only as whole words: "true" or "5432"
+# inside a longer run of letters, digits and _ ("construed", "54321") is not the secret
+SHORT_VALUE_LENGTH = 2 * PREFILTER_GRAM_MIN - 1
+# Up to this many short values are located with str.find (fast per value), beyond it with one regex
+SHORT_FIND_MAX = 8
+
+
+def _is_word(char: str) -> bool:
+    """Same characters as the regex class \\w (char may be '')"""
+    return char.isalnum() or char == '_'
+
+
+def _build_trie(words) -> dict:
+    """char -> child node; '' marks the end of a value"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for the words of a trie; alternatives differ in their first character, so matching
+    never retries a branch, and continuing is preferred to stopping (longest match)"""
+    chain = []
+    while len(node) == 1 and '' not in node:
+        # Follow single-child runs iteratively: long values would otherwise recurse once per character
+        char, node = next(iter(node.items()))
+        chain.append(re.escape(char))
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in node.items() if char]
+    if not branches:
+        tail = ''
+    elif len(branches) == 1:
+        tail = branches[0]
+    else:
+        tail = '(?:' + '|'.join(branches) + ')'
+    if '' in node and tail:
+        tail = f'(?:{tail})?'
+    return ''.join(chain) + tail
+
+
+def _whole_word_pattern(value: str) -> str:
+    """Regex for value not preceded or followed by a word character at a word-character edge"""
+    pattern = re.escape(value)
+    if _is_word(value[0]):
+        pattern = r'(?<!\w)' + pattern
+    if _is_word(value[-1]):
+        pattern += r'(?!\w)'
+    return pattern
+
+
+class Redactor:
+    """Finds secret values in text with one multi-pattern automaton built up front: Aho-Corasick
+    when the optional pyahocorasick package is installed, otherwise a trie-shaped regex.
+    Values shorter than SHORT_VALUE_LENGTH are matched as whole words by a separate scan"""
+    
+    def __init__(self, values, mask: str = REDACT_MASK, min_length: int = REDACT_MIN_LENGTH):
+        self.mask = mask
+        words = sorted({value for value in values if value and len(value) >= min_length})
+        self.max_length = max(map(len, words), default=0)
+        self._trie = _build_trie(words)
+        long_words = [word for word in words if len(word) >= SHORT_VALUE_LENGTH]
+        # Longest first: at one position the longest value wins
+        self._short = sorted((word for word in words if len(word) < SHORT_VALUE_LENGTH), key=len, reverse=True)
+        self._short_pattern = None
+        if len(self._short) > SHORT_FIND_MAX:
+            # The lookahead lets the regex engine skip positions no value starts at
+            first = ''.join(sorted({re.escape(word[0]) for word in self._short}))
+            self._short_pattern = re.compile(f'(?=[{first}])(?:' + '|'.join(map(_whole_word_pattern, self._short)) + ')')
+        self._long_length = max(map(len, long_words), default=0)
+        self._automaton = None
+        self._pattern = None
+        if not long_words:
+            return
+        # Every long value is at least 2 * PREFILTER_GRAM_MIN - 1 long, so grams are long enough to filter
+        self._gram_length = min(PREFILTER_GRAM_MAX, (len(min(long_words, key=len)) + 1) // 2)
+        self._gram_split = re.compile(f'.{{{self._gram_length}}}', re.S)
+        self._grams = {word[i:i + self._gram_length] for word in long_words
+                       for i in range(len(word) - self._gram_length + 1)}
+        try:
+            import ahocorasick
+        except ImportError:
+            self._pattern = re.compile(_trie_pattern(_build_trie(long_words)))
+        else:
+            self._automaton = ahocorasick.Automaton()
+            for word in long_words:
+                self._automaton.add_word(word, len(word))
+            self._automaton.make_automaton()
+    
+    @property
+    def backend(self) -> str:
+        return "pyahocorasick" if self._automaton is not None else "regex"
+    
+    def _scan(self, text: str, start: int, end: int):
+        if start >= end:
+            return
+        if self._automaton is not None:
+            for last, length in self._automaton.iter_long(text, start, end):
+                yield last + 1 - length, last + 1
+        else:
+            for match in self._pattern.finditer(text, start, end):
+                yield match.span()
+    
+    def _long_matches(self, text: str):
+        """(start, end) of leftmost-longest, non-overlapping long values"""
+        if not self._long_length:
+            return
+        grams = self._gram_split.findall(text)
+        if self._grams.isdisjoint(grams):
+            return
+        # An occurrence containing the gram at offset lies within max_length of it; overlapping windows merge
+        k = self._gram_length
+        max_length = self._long_length
+        window_start = window_end = None
+        for offset in compress(range(0, len(grams) * k, k), map(self._grams.__contains__, grams)):
+            start = max(0, offset + k - max_length)
+            if window_end is not None and start <= window_end:
+                window_end = min(len(text), offset + max_length)
+                continue
+            if window_end is not None:
+                yield from self._scan(text, window_start, window_end)
+            window_start, window_end = start, min(len(text), offset + max_length)
+        if window_end is not None:
+            yield from self._scan(text, window_start, window_end)
+    
+    def _short_matches(self, text: str, before: str):
+        """(start, end) of leftmost-longest, non-overlapping whole-word short values; before is the
+        text preceding text (only its last character is looked at)"""
+        if not self._short:
+            return
+        if self._short_pattern is not None:
+            context = before[-1:]
+            for match in self._short_pattern.finditer(context + text, len(context)):
+                yield match.start() - len(context), match.end() - len(context)
+            return
+        found = []
+        for word in self._short:
+            check_start, check_end = _is_word(word[0]), _is_word(word[-1])
+            start = text.find(word)
+            while start >= 0:
+                end = start + len(word)
+                preceding = text[start - 1] if start else before[-1:]
+                if not (check_start and _is_word(preceding) or check_end and _is_word(text[end:end + 1])):
+                    found.append((start, -end))
+                start = text.find(word, start + 1)
+        pos = 0
+        for start, end in sorted(found):
+            if start >= pos:
+                yield start, -end
+                pos = -end
+    
+    def _matches(self, text: str, before: str = ''):
+        """(start, end) of long and short matches in order of start; spans may overlap"""
+        return heapq.merge(self._long_matches(text), self._short_matches(text, before))
+    
+    def _undecided(self, text: str) -> int:
+        """Earliest index whose rest of text is a proper prefix of some value (could still grow
+        into a match with more input) or a short value that more input could disqualify, or len(text)"""
+        for i in range(max(0, len(text) - self.max_length), len(text)):
+            node = self._trie
+            for char in text[i:]:
+                node = node.get(char)
+                if node is None:
+                    break
+            else:
+                if len(node) > ('' in node):
+                    return i
+                # A whole short value at the very end: the next character decides whether it matches
+                if '' in node and len(text) - i < SHORT_VALUE_LENGTH and _is_word(text[-1]):
+                    return i
+        return len(text)
+    
+    def _replace(self, text: str, stop: int, before: str):
+        """(pieces, cut): text[:cut] with values masked. cut is stop, or the start of a match that
+        reaches past stop: a value starting in the undecided tail may still join it, so it is left
+        for the next chunk"""
+        out = []
+        pos = last = 0
+        for start, end in self._matches(text, before):
+            if start >= stop:
+                break
+            if start < pos:
+                # Overlaps the previous match (a long and a short value): one mask covers both
+                pos = max(pos, end)
+            else:
+                out.append(text[pos:start])
+                out.append(self.mask)
+                last, pos = start, end
+            if pos > stop:
+                out.pop()
+                return out, last
+        out.append(text[pos:stop])
+        return out, stop
+    
+    def redact(self, text: str, before: str = '') -> str:
+        """text with every value replaced by the mask; before is text already written ahead of it"""
+        if not self.max_length:
+            return text
+        out, _ = self._replace(text, len(text), before)
+        return ''.join(out)
+    
+    def redact_partial(self, text: str, before: str = ''):
+        """(redacted text, held-back tail) for a stream that continues after text: only a tail
+        that may be the start of a value is held back, to be prepended to the next chunk"""
+        if not self.max_length:
+            return text, ''
+        out, cut = self._replace(text, self._undecided(text), before)
+        return ''.join(out), text[cut:]
+
+
+class RedactingStream:
+    """Binary writer that redacts values before passing output on to dest"""
+    
+    def __init__(self, dest, redactor: Redactor, encoding: str = 'utf-8'):
+        self.dest = dest
+        self.redactor = redactor
+        self.encoding = encoding
+        # surrogateescape: bytes that are not valid text pass through unchanged
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='surrogateescape')
+        self._pending = ''
+        self._before = ''  # last character passed on, for whole-word matching at the start of the next chunk
+    
+    def write(self, data: bytes) -> int:
+        text = self._pending + self._decoder.decode(data)
+        redacted, self._pending = self.redactor.redact_partial(text, self._before)
+        self._before = (self._before + text[:len(text) - len(self._pending)])[-1:]
+        if redacted:
+            self.dest.write(redacted.encode(self.encoding, 'surrogateescape'))
+        return len(data)
+    
+    def flush(self):
+        self.dest.flush()
+    
+    def close(self):
+        """End of stream: write out the held-back tail (dest stays open)"""
+        text = self.redactor.redact(self._pending + self._decoder.decode(b'', final=True), self._before)
+        self._pending = ''
+        self._before = ''
+        if text:
+            self.dest.write(text.encode(self.encoding, 'surrogateescape'))
+        self.dest.flush()
@@ -0,0 +1,226 @@
+"""
+Runs a stack of commands described in an ldcm-run.toml file, each with its own project/env secrets
+
+    [services.api]
+    env = "shop/dev"
+    command = "npm start"
+    dir = "api"            # optional, relative to the file
+    
+    [services.worker]
+    env = "shop/dev"
+    command = "python worker.py"
+"""
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from typing import NamedTuple
+from src.config import INJECT_PIPE_CHUNK, RUN_STOP_TIMEOUT
+from src.injector import InjectionEngine
+from src.redact import Redactor
+
+SERVICE_FIELDS = ("env", "command", "dir")
+
+
+class Service(NamedTuple):
+    """One command of a run file"""
+    name: str
+    path: str
+    command: str
+    dir: str = None
+
+
+def load_run_file(path: str) -> list:
+    """Services of a run file, in file order"""
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ValueError("Reading run files requires Python 3.11+ or tomli (pip install tomli)")
+    with open(path, "rb") as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+    tables = data.get("services")
+    if not isinstance(tables, dict) or not tables:
+        raise ValueError(f"{path}: no [services.<name>] tables")
+    base = os.path.dirname(os.path.abspath(path))
+    services = []
+    for name, table in tables.items():
+        if not isinstance(table, dict):
+            raise ValueError(f"{path}: services.{name} must be a table")
+        unknown = sorted(set(table) - set(SERVICE_FIELDS))
+        if unknown:
+            raise ValueError(f"{path}: services.{name}: unknown field(s) {', '.join(unknown)}")
+        env, command, working_dir = table.get("env"), table.get("command"), table.get("dir")
+        if not isinstance(env, str) or "/" not in env:
+            raise ValueError(f'{path}: services.{name}.env must be "project/env"')
+        if not isinstance(command, str) or not command.strip():
+            raise ValueError(f"{path}: services.{name}.command is missing")
+        if working_dir is not None:
+            working_dir = os.path.join(base, str(working_dir))
+        services.append(Service(name, env, command, working_dir))
+    return services
+
+
+class _PrefixedWriter:
+    """Binary writer that starts every line with prefix; lines are written whole under a lock
+    shared by all services, so concurrent output interleaves by line, never mid-line"""
+    
+    def __init__(self, dest, prefix: bytes, lock, limit: int = INJECT_PIPE_CHUNK):
+        self.dest = dest
+        self.prefix = prefix
+        self.lock = lock
+        self.limit = limit
+        self._partial = b""
+    
+    def _emit(self, lines: list):
+        out = b"".join(self.prefix + line + b"\n" for line in lines)
+        with self.lock:
+            self.dest.write(out)
+            self.dest.flush()
+    
+    def write(self, data: bytes) -> int:
+        buffered = self._partial + data
+        end = buffered.rfind(b"\n")
+        if end < 0:
+            if len(buffered) < self.limit:
+                self._partial = buffered
+                return len(data)
+            # A line longer than limit is cut rather than buffered without bound
+            end = len(buffered)
+        self._partial = buffered[end + 1:]
+        self._emit(buffered[:end].split(b"\n"))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        """Write out an unterminated last line"""
+        if self._partial:
+            self._emit([self._partial])
+            self._partial = b""
+
+
+class StackRunner:
+    """Runs services side by side with prefixed output; the first one to fail stops the others"""
+    
+    def __init__(self, services: list, environments: dict, redact: bool = False, stdout=None, stderr=None,
+                 stop_timeout: float = RUN_STOP_TIMEOUT):
+        self.services = services
+        self.environments = environments  # "project/env" -> {key: value}
+        self.redact = redact
+        self.stdout = stdout
+        self.stderr = stderr
+        self.stop_timeout = stop_timeout
+        self._commands = {}  # service name -> PipedCommand
+        self._lock = threading.Lock()
+        self._events = queue.SimpleQueue()  # (service name, exit code), or (None, signal) from a handler
+        self._stop_signal = None
+    
+    def _announce(self, message: str):
+        with self._lock:
+            self.stderr.write(f"ldcm: {message}\n".encode("utf-8"))
+            self.stderr.flush()
+    
+    def stop(self, signum: int = signal.SIGTERM):
+        """Send signum to every service still running (its whole process group)"""
+        for command in list(self._commands.values()):
+            if command.process.poll() is not None:
+                continue
+            try:
+                if os.name == "nt":
+                    command.process.terminate()
+                else:
+                    os.killpg(command.process.pid, signum)
+            except ProcessLookupError:
+                pass
+    
+    def _on_signal(self, signum, frame):
+        # Services run in their own sessions, so terminal signals reach them only through us
+        if self._stop_signal is None:
+            self._stop_signal = signum
+        self.stop(signum)
+        self._events.put((None, signum))
+    
+    def _wait(self, name: str, command, writers: tuple):
+        code = command.wait()
+        for writer in writers:
+            writer.close()
+        self._events.put((name, code))
+    
+    def _start(self, service: Service, width: int) -> bool:
+        prefix = f"{service.name:<{width}} | ".encode("utf-8")
+        writers = (_PrefixedWriter(self.stdout, prefix, self._lock), _PrefixedWriter(self.stderr, prefix, self._lock))
+        secrets = self.environments[service.path]
+        try:
+            command = InjectionEngine.start_piped(secrets, service.command, service.dir, *writers,
+                                                  redactor=Redactor(secrets.values()) if self.redact else None,
+                                                  detach=True)
+        except OSError as e:
+            self._announce(f"{service.name} could not start: {e}")
+            return False
+        self._commands[service.name] = command
+        threading.Thread(target=self._wait, args=(service.name, command, writers), daemon=True).start()
+        return True
+    
+    def run(self) -> int:
+        """Start every service and wait for all of them; returns 0 when all exited cleanly, otherwise
+        the exit code of the first to fail (negative: the signal that stopped the stack)"""
+        self.stdout = self.stdout or sys.stdout.buffer
+        self.stderr = self.stderr or sys.stderr.buffer
+        previous = {}
+        if threading.current_thread() is threading.main_thread():
+            for name in ("SIGINT", "SIGTERM", "SIGHUP"):
+                signum = getattr(signal, name, None)
+                if signum is not None:
+                    previous[signum] = signal.signal(signum, self._on_signal)
+        try:
+            return self._supervise()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+    
+    def _supervise(self) -> int:
+        width = max(len(service.name) for service in self.services)
+        returncode = 0
+        for service in self.services:
+            if self._stop_signal is not None:
+                break
+            if not self._start(service, width):
+                returncode = 1
+                self.stop()
+                break
+        
+        running = len(self._commands)
+        deadline = None
+        killed = False
+        while running:
+            stopping = returncode != 0 or self._stop_signal is not None
+            if stopping and deadline is None and not killed:
+                deadline = time.monotonic() + self.stop_timeout
+            try:
+                name, code = self._events.get(timeout=None if deadline is None else max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                self._announce(f"services still running after {self.stop_timeout}s, killing them")
+                self.stop(getattr(signal, "SIGKILL", signal.SIGTERM))
+                deadline = None
+                killed = True
+                continue
+            if name is None:
+                continue
+            running -= 1
+            self._announce(f"{name} exited with code {code}")
+            if code != 0 and not stopping:
+                returncode = code
+                self._announce("stopping the other services")
+                self.stop()
+        if returncode == 0 and self._stop_signal is not None:
+            return -self._stop_signal
+        return returncode
@@ -1,13 +1,129 @@
-from src.database import Database, Project, Environment, Secret, VaultSettings
-from src.crypto import CryptoEngine
+from src.database import Database, Project, Environment, EnvironmentKey, Secret, VaultSettings
+from sqlalchemy import and_, bindparam, func, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.crypto import CryptoEngine, DecryptResult, KdfParams, KDF_LEGACY, KDF_ARGON2ID
+from src.cache import DecryptCache
+from src.migrations import MIGRATION_BATCH_SIZE
+from src.config import CONFLICT_POLICIES, DECRYPT_CACHE_TTL_SECONDS, SEARCH_LIMIT, SECRETS_PAGE_SIZE
+from contextlib import contextmanager
 from datetime import datetime
+from typing import NamedTuple
 import os
 
+RESOLVE_CACHE_SIZE = 256
+# Rows fetched and decrypted per round trip when streaming the whole vault
+EXPORT_BATCH_SIZE = 1000
+# Ids per IN (...) clause, below SQLite's bound-parameter limit
+ID_BATCH_SIZE = 500
+
+class ProjectRecord(NamedTuple):
+    """Read-only project row"""
+    id: int
+    name: str
+    created_at: datetime
+
+
+class EnvironmentRecord(NamedTuple):
+    """Read-only environment row"""
+    id: int
+    project_id: int
+    name: str
+
+
+class SecretRecord(NamedTuple):
+    """Read-only secret row (still encrypted)"""
+    id: int
+    environment_id: int
+    key: str
+    encrypted_value: bytes
+    created_at: datetime
+    expires_at: datetime
+
+
+def _columns(model, record_type) -> list:
+    """Table columns named by a record type's fields"""
+    return [model.__table__.c[name] for name in record_type._fields]
+
+
+def _glob_literal(text: str) -> str:
+    """Escape GLOB metacharacters so text matches only itself"""
+    return "".join(f"[{c}]" if c in "*?[" else c for c in text)
+
+
+class KeyFilter(NamedTuple):
+    """Key selection pushed down into SQL, so unselected rows are never loaded or decrypted.
+    A key is kept if it matches any of only/prefixes (all keys when both are empty) and none of exclude;
+    names containing * ? [ are case-sensitive globs, other names exact"""
+    only: tuple = ()
+    exclude: tuple = ()
+    prefixes: tuple = ()
+    
+    def _match(self, names: tuple) -> list:
+        exact = [name for name in names if not any(c in name for c in "*?[")]
+        clauses = [Secret.key.op("GLOB")(name) for name in names if name not in exact]
+        if exact:
+            clauses.append(Secret.key.in_(exact))
+        return clauses
+    
+    def clauses(self) -> list:
+        """WHERE clauses on Secret.key; prefixes become GLOB 'PREFIX*', which SQLite serves from the key index"""
+        clauses = []
+        selected = self._match(self.only) + [Secret.key.op("GLOB")(_glob_literal(p) + "*") for p in self.prefixes]
+        if selected:
+            clauses.append(or_(*selected))
+        excluded = self._match(self.exclude)
+        if excluded:
+            clauses.append(~or_(*excluded))
+        return clauses
+    
+    def strip(self, key: str) -> str:
+        """key without the first of prefixes it starts with"""
+        for prefix in self.prefixes:
+            if key.startswith(prefix):
+                return key[len(prefix):]
+        return key
+
+
+class SearchHit(NamedTuple):
+    """Where a key is defined (nothing is decrypted)"""
+    secret_id: int
+    project: str
+    environment: str
+    key: str
+
+
+class EnvironmentNode(NamedTuple):
+    """Environment in the project tree"""
+    id: int
+    project_id: int
+    name: str
+    secret_count: int
+    keys: tuple = ()
+
+
+class ProjectNode(NamedTuple):
+    """Project with its environments, as returned by get_project_tree"""
+    id: int
+    name: str
+    environments: list
+
+
 class VaultManager:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_size: int = 0, cache_ttl: float = DECRYPT_CACHE_TTL_SECONDS):
         self.db = Database(db_path)
         self.crypto = CryptoEngine()
         self._unlocked = False
+        # Unwrapped per-environment data keys: environment_id -> CryptoEngine
+        self._data_keys = {}
+        # (project name, environment name) -> Environment, for repeated path lookups
+        self._resolved = {}
+        # Opt-in cache of decrypted values, purged on lock
+        self.cache = DecryptCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # Session of the active transaction() block, shared by nested calls
+        self._session = None
+        # Whether the FTS5 key index exists (None until checked)
+        self._search_index = None
     
     def is_initialized(self) -> bool:
         """Check if vault has been set up with master password"""
@@ -17,17 +133,20 @@ class VaultManager:
         finally:
             session.close()
     
-    def initialize(self, master_password: str) -> bool:
+    def initialize(self, master_password: str, kdf_params: KdfParams = None) -> bool:
         """Initialize vault with master password"""
         if self.is_initialized():
             return False
-        password_hash, salt = self.crypto.hash_password(master_password)
+        kdf_params = kdf_params or KdfParams.default()
+        salt = self.crypto.generate_salt()
+        self.crypto.derive_key(master_password, salt, kdf_params)
         session = self.db.get_session()
         try:
-            settings = VaultSettings(master_password_hash=password_hash, salt=salt)
+            settings = VaultSettings(master_password_hash='', salt=salt, kdf_version=KDF_ARGON2ID,
+                                     envelope_complete=1)
+            self._store_kdf(settings, salt, kdf_params, self.crypto)
             session.add(settings)
             session.commit()
-            self.crypto.derive_key(master_password, salt)
             self._unlocked = True
             return True
         finally:
@@ -40,113 +159,648 @@ class VaultManager:
             settings = session.query(VaultSettings).first()
             if not settings:
                 return False
-            if self.crypto.verify_password(master_password, settings.master_password_hash, settings.salt):
-                self.crypto.derive_key(master_password, settings.salt)
-                self._unlocked = True
-                return True
+            # Derive into a fresh engine so a wrong password leaves the current key alone
+            crypto = CryptoEngine()
+            if settings.kdf_version == KDF_LEGACY:
+                if not crypto.verify_password(master_password, settings.master_password_hash, settings.salt):
+                    return False
+                crypto.derive_legacy_key(master_password, settings.salt)
+                self.crypto = crypto
+                self._migrate_to_envelope(session, settings)
+                self._rekey(session, settings, master_password, KdfParams.default())
+            else:
+                kdf_params = self._load_kdf(settings)
+                crypto.derive_key(master_password, settings.salt, kdf_params)
+                if not crypto.verify_key_check(settings.key_check):
+                    crypto.clear_key()
+                    return False
+                self.crypto = crypto
+                if settings.kdf_time_cost is None:
+                    # Pin the defaults so a library upgrade cannot change this vault's key
+                    self._store_kdf(settings, settings.salt, kdf_params, self.crypto)
+                    session.commit()
+                self._migrate_to_envelope(session, settings)
+            self._unlocked = True
+            return True
+        finally:
+            session.close()
+    
+    def get_kdf_params(self) -> KdfParams:
+        """Argon2id parameters of this vault"""
+        session = self.db.get_session()
+        try:
+            return self._load_kdf(session.query(VaultSettings).first())
+        finally:
+            session.close()
+    
+    def change_password(self, old_password: str, new_password: str) -> bool:
+        """Change the master password by re-wrapping the environment data keys"""
+        if not self.unlock(old_password):
+            return False
+        self.rekey(new_password)
+        return True
+    
+    def change_kdf(self, master_password: str, kdf_params: KdfParams) -> bool:
+        """Re-derive the vault key with new Argon2id parameters"""
+        if not self.unlock(master_password):
             return False
+        self.rekey(master_password, kdf_params)
+        return True
+    
+    def rekey(self, master_password: str, kdf_params: KdfParams = None):
+        """Re-key an unlocked vault under master_password (new or current) with kdf_params (default:
+        the current ones); for callers that just verified the password with unlock()"""
+        if not self._unlocked:
+            raise ValueError("Vault is locked")
+        session = self.db.get_session()
+        try:
+            settings = session.query(VaultSettings).first()
+            self._rekey(session, settings, master_password, kdf_params or self._load_kdf(settings))
         finally:
             session.close()
     
+    def _load_kdf(self, settings) -> KdfParams:
+        if settings.kdf_time_cost is None:
+            return KdfParams.default()
+        return KdfParams(settings.kdf_time_cost, settings.kdf_memory_cost, settings.kdf_parallelism)
+    
+    def _store_kdf(self, settings, salt: str, kdf_params: KdfParams, crypto: CryptoEngine):
+        settings.salt = salt
+        settings.kdf_time_cost, settings.kdf_memory_cost, settings.kdf_parallelism = kdf_params
+        settings.key_check = crypto.create_key_check()
+    
+    def _rekey(self, session, settings, master_password: str, kdf_params: KdfParams):
+        """Derive a new master key and re-wrap every environment data key with it"""
+        new_crypto = CryptoEngine()
+        salt = new_crypto.generate_salt()
+        new_crypto.derive_key(master_password, salt, kdf_params)
+        for env_key in session.query(EnvironmentKey).all():
+            env_key.wrapped_key = new_crypto.wrap_key(self.crypto.unwrap_key(env_key.wrapped_key))
+        settings.master_password_hash = ''
+        settings.kdf_version = KDF_ARGON2ID
+        self._store_kdf(settings, salt, kdf_params, new_crypto)
+        session.commit()
+        self.crypto.clear_key()
+        self.crypto = new_crypto
+    
+    def _migrate_to_envelope(self, session, settings):
+        """Move secrets still encrypted directly by the master key under environment data keys
+        (once per vault: settings.envelope_complete records that it is done)"""
+        if settings.envelope_complete:
+            return
+        # Keys are stored before their secrets are rewritten, so an interrupted run leaves
+        # at most its last keyed environment partly done: finish that one first
+        last = session.execute(select(EnvironmentKey.environment_id, EnvironmentKey.wrapped_key)
+                               .order_by(EnvironmentKey.id.desc()).limit(1)).first()
+        if last is not None:
+            self._reencrypt_environment(session, last.environment_id,
+                                        self.crypto.for_key(self.crypto.unwrap_key(last.wrapped_key)))
+        keyed = select(EnvironmentKey.environment_id)
+        pending = session.execute(select(Secret.environment_id)
+                                  .where(Secret.environment_id.not_in(keyed)).distinct()).scalars().all()
+        for environment_id in pending:
+            data_key = self.crypto.generate_data_key()
+            session.add(EnvironmentKey(environment_id=environment_id, wrapped_key=self.crypto.wrap_key(data_key)))
+            session.commit()
+            self._reencrypt_environment(session, environment_id, self.crypto.for_key(data_key))
+        settings.envelope_complete = 1
+        session.commit()
+    
+    def _reencrypt_environment(self, session, environment_id: int, env_crypto: CryptoEngine):
+        """Re-encrypt an environment's master-key secrets with its data key, in id-keyset batches
+        committed one at a time; rows the master key no longer opens were done by an interrupted run"""
+        secrets = Secret.__table__
+        query = (select(secrets.c.id, secrets.c.encrypted_value)
+                 .where(secrets.c.environment_id == environment_id)
+                 .order_by(secrets.c.id)
+                 .limit(MIGRATION_BATCH_SIZE))
+        update = (secrets.update().where(secrets.c.id == bindparam('secret_id'))
+                  .values(encrypted_value=bindparam('value')))
+        last_id = 0
+        while True:
+            rows = session.execute(query.where(secrets.c.id > last_id)).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            results = self.crypto.decrypt_batch([row.encrypted_value for row in rows])
+            legacy = [(row.id, result.value) for row, result in zip(rows, results) if result.ok]
+            if legacy:
+                ciphertexts = env_crypto.encrypt_batch([value for _, value in legacy])
+                session.execute(update, [{'secret_id': secret_id, 'value': ciphertext}
+                                         for (secret_id, _), ciphertext in zip(legacy, ciphertexts)])
+                session.commit()
+    
+    def _load_or_create_key(self, session, environment_id: int):
+        """(EnvironmentKey, created) for the environment; a created key holds a new wrapped data key
+        and is not yet added to session"""
+        env_key = session.query(EnvironmentKey).filter_by(environment_id=environment_id).first()
+        if env_key is not None:
+            return env_key, False
+        return EnvironmentKey(
+            environment_id=environment_id,
+            wrapped_key=self.crypto.wrap_key(self.crypto.generate_data_key())
+        ), True
+    
+    def _environment_crypto(self, environment_id: int) -> CryptoEngine:
+        """Engine keyed with the environment's data key, creating the key on first use"""
+        env_crypto = self._data_keys.get(environment_id)
+        if env_crypto is not None:
+            return env_crypto
+        if self._session is not None:
+            # Inside a transaction the key is written with it (a second connection would block on its lock)
+            session = self._session
+            env_key, created = self._load_or_create_key(session, environment_id)
+            if created:
+                # Added only once the savepoint is open: begin_nested() flushes what is already pending
+                savepoint = session.begin_nested()
+                session.add(env_key)
+                try:
+                    session.flush()
+                    savepoint.commit()
+                except IntegrityError:
+                    # Another process created it first; the rest of the transaction stays intact.
+                    # (If nothing was written before, pysqlite's savepoint is the transaction and
+                    # releasing it stores the key early, as outside a transaction: a valid key either way)
+                    savepoint.rollback()
+                    env_key = session.query(EnvironmentKey).filter_by(environment_id=environment_id).one()
+        else:
+            session = self.db.get_session()
+            try:
+                env_key, created = self._load_or_create_key(session, environment_id)
+                if created:
+                    session.add(env_key)
+                    try:
+                        session.commit()
+                    except IntegrityError:
+                        # Another process created it first
+                        session.rollback()
+                        env_key = session.query(EnvironmentKey).filter_by(environment_id=environment_id).one()
+            finally:
+                session.close()
+        env_crypto = self.crypto.for_key(self.crypto.unwrap_key(env_key.wrapped_key))
+        self._data_keys[environment_id] = env_crypto
+        return env_crypto
+    
+    def _clear_data_keys(self):
+        for env_crypto in self._data_keys.values():
+            env_crypto.clear_key()
+        self._data_keys.clear()
+    
+    def unlock_with(self, crypto: CryptoEngine) -> bool:
+        """Unlock vault with an already keyed crypto engine (e.g. the key agent)"""
+        if not self.is_initialized():
+            return False
+        self._clear_data_keys()
+        self.crypto = crypto
+        self._unlocked = True
+        return True
+    
     def lock(self):
         """Lock vault and clear encryption key"""
+        if self.cache:
+            self.cache.clear()
+        self._clear_data_keys()
         self.crypto.clear_key()
+        self.crypto = CryptoEngine()
         self._unlocked = False
     
     @property
     def is_unlocked(self) -> bool:
         return self._unlocked
     
-    # Project operations
-    def create_project(self, name: str) -> Project:
+    @contextmanager
+    def transaction(self):
+        """Unit of work: vault calls inside the block share one session and commit once"""
+        if self._session is not None:
+            # Nested block joins the outer transaction
+            yield self._session
+            return
         session = self.db.get_session()
+        self._session = session
         try:
-            project = Project(name=name)
-            session.add(project)
-            session.commit()
-            session.refresh(project)
-            # Create default environments
-            for env_name in ['dev', 'staging', 'test']:
-                env = Environment(project_id=project.id, name=env_name)
-                session.add(env)
+            yield session
             session.commit()
-            return project
+        except BaseException:
+            session.rollback()
+            # Data keys loaded or created in this transaction may not be stored
+            self._clear_data_keys()
+            raise
         finally:
+            self._session = None
             session.close()
     
+    # Project operations
+    def create_project(self, name: str) -> Project:
+        with self.transaction() as session:
+            # Project and default environments are inserted together
+            project = Project(name=name, environments=[
+                Environment(name=env_name) for env_name in ['dev', 'staging', 'test']
+            ])
+            session.add(project)
+            try:
+                session.flush()
+            except IntegrityError:
+                raise ValueError(f"Project '{name}' already exists")
+            return project
+    
     def get_projects(self) -> list:
+        with self.db.engine.connect() as conn:
+            return list(map(ProjectRecord._make, conn.execute(select(*_columns(Project, ProjectRecord)))))
+    
+    def get_project_tree(self, include_keys: bool = False) -> list:
+        """Projects with their environments and secret counts from one aggregated query
+        (plus one for key names when include_keys is set)"""
         session = self.db.get_session()
         try:
-            return session.query(Project).all()
+            rows = (session.query(Project.id, Project.name, Environment.id, Environment.name, func.count(Secret.id))
+                    .outerjoin(Environment, Environment.project_id == Project.id)
+                    .outerjoin(Secret, Secret.environment_id == Environment.id)
+                    .group_by(Project.id, Environment.id)
+                    .order_by(Project.id, Environment.id)
+                    .all())
+            keys = {}
+            if include_keys:
+                key_rows = session.query(Secret.environment_id, Secret.key).order_by(Secret.environment_id, Secret.key)
+                for environment_id, key in key_rows:
+                    keys.setdefault(environment_id, []).append(key)
         finally:
             session.close()
+        
+        tree = []
+        for project_id, project_name, env_id, env_name, count in rows:
+            if not tree or tree[-1].id != project_id:
+                tree.append(ProjectNode(project_id, project_name, []))
+            if env_id is not None:
+                tree[-1].environments.append(
+                    EnvironmentNode(env_id, project_id, env_name, count, tuple(keys.get(env_id, ())))
+                )
+        return tree
     
     def delete_project(self, project_id: int):
-        session = self.db.get_session()
-        try:
+        with self.transaction() as session:
             project = session.query(Project).filter_by(id=project_id).first()
             if project:
                 session.delete(project)
-                session.commit()
-        finally:
-            session.close()
+                session.flush()
+                self._resolved.clear()
+                self._clear_data_keys()
+                if self.cache:
+                    self.cache.clear()
     
     # Environment operations
     def get_environments(self, project_id: int) -> list:
-        session = self.db.get_session()
-        try:
-            return session.query(Environment).filter_by(project_id=project_id).all()
-        finally:
-            session.close()
+        query = select(*_columns(Environment, EnvironmentRecord)).where(Environment.project_id == project_id)
+        with self.db.engine.connect() as conn:
+            return list(map(EnvironmentRecord._make, conn.execute(query)))
+    
+    def resolve(self, project_name: str, env_name: str):
+        """Environment for a project/environment name pair, or None"""
+        env = self._resolved.get((project_name, env_name))
+        if env is not None:
+            return env
+        query = (select(*_columns(Environment, EnvironmentRecord))
+                 .join(Project, Project.id == Environment.project_id)
+                 .where(Project.name == project_name, Environment.name == env_name))
+        with self.db.engine.connect() as conn:
+            row = conn.execute(query).first()
+        if row is None:
+            return None
+        env = EnvironmentRecord._make(row)
+        self._remember(project_name, env_name, env)
+        return env
+    
+    def get_secrets_by_path(self, path: str, keys: KeyFilter = None):
+        """Secrets of "project/env" (only those selected by keys) in one joined query,
+        or None if the path does not exist"""
+        project_name, _, env_name = path.rpartition('/')
+        env = self._resolved.get((project_name, env_name))
+        if env is not None:
+            return self.get_secrets(env.id, keys)
+        env_columns = _columns(Environment, EnvironmentRecord)
+        key_clauses = keys.clauses() if keys else []
+        # Outer join (filter in the ON clause) so an existing environment with no matches still yields its row
+        query = (select(*env_columns, *_columns(Secret, SecretRecord))
+                 .join(Project, Project.id == Environment.project_id)
+                 .outerjoin(Secret, and_(Secret.environment_id == Environment.id, *key_clauses))
+                 .where(Project.name == project_name, Environment.name == env_name))
+        if keys:
+            query = query.order_by(Secret.key)
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            return None
+        split = len(env_columns)
+        self._remember(project_name, env_name, EnvironmentRecord._make(rows[0][:split]))
+        return [SecretRecord._make(row[split:]) for row in rows if row[split] is not None]
+    
+    def get_secrets_by_paths(self, paths) -> dict:
+        """{"project/env": secrets} for several paths in one joined query; paths that do not exist are left out"""
+        pairs = {path: tuple(path.rpartition('/')[::2]) for path in paths}
+        if not pairs:
+            return {}
+        env_columns = _columns(Environment, EnvironmentRecord)
+        query = (select(Project.name, *env_columns, *_columns(Secret, SecretRecord))
+                 .join(Project, Project.id == Environment.project_id)
+                 .outerjoin(Secret, Secret.environment_id == Environment.id)
+                 .where(or_(*[and_(Project.name == project_name, Environment.name == env_name)
+                              for project_name, env_name in pairs.values()])))
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        split = 1 + len(env_columns)
+        found = {}
+        for row in rows:
+            env = EnvironmentRecord._make(row[1:split])
+            secrets = found.get((row[0], env.name))
+            if secrets is None:
+                secrets = found[(row[0], env.name)] = []
+                self._remember(row[0], env.name, env)
+            if row[split] is not None:
+                secrets.append(SecretRecord._make(row[split:]))
+        return {path: found[pair] for path, pair in pairs.items() if pair in found}
+    
+    def get_secret_value(self, path: str, key: str):
+        """Decrypted value of one key in "project/env" (one indexed row, one decrypt), or None"""
+        if not self._unlocked:
+            raise ValueError("Vault is locked")
+        project_name, _, env_name = path.rpartition('/')
+        query = select(*_columns(Secret, SecretRecord)).where(Secret.key == key)
+        env = self._resolved.get((project_name, env_name))
+        if env is not None:
+            query = query.where(Secret.environment_id == env.id)
+        else:
+            query = (query.join(Environment, Environment.id == Secret.environment_id)
+                     .join(Project, Project.id == Environment.project_id)
+                     .where(Project.name == project_name, Environment.name == env_name))
+        with self.db.engine.connect() as conn:
+            row = conn.execute(query).first()
+        if row is None:
+            return None
+        return self.decrypt_secret(SecretRecord._make(row))
+    
+    def search_keys(self, pattern: str, field: str = "key", limit: int = SEARCH_LIMIT) -> list:
+        """SearchHits whose key (or project/environment name, or any of them) matches pattern:
+        a case-sensitive glob when it contains * ? [, otherwise a case-insensitive substring"""
+        fields = ("key", "project", "environment") if field == "any" else (field,)
+        if self._search_index is None:
+            with self.db.engine.connect() as conn:
+                self._search_index = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'secret_search'"
+                )).first() is not None
+        if self._search_index:
+            source = "secret_search"
+            columns = {"id": "rowid", "key": "key", "project": "project", "environment": "environment"}
+        else:
+            # SQLite without FTS5/trigram: same predicates over the joined tables, unindexed
+            source = ("secrets s JOIN environments e ON e.id = s.environment_id "
+                      "JOIN projects p ON p.id = e.project_id")
+            columns = {"id": "s.id", "key": "s.key", "project": "p.name", "environment": "e.name"}
+        
+        params = {"limit": limit}
+        if any(c in pattern for c in "*?["):
+            where = " OR ".join(f"{columns[f]} GLOB :pattern" for f in fields)
+            params["pattern"] = pattern
+        elif self._search_index and len(pattern) >= 3:
+            # A quoted trigram phrase matches the pattern as a substring
+            where = "secret_search MATCH :query"
+            params["query"] = "{" + " ".join(fields) + "}: \"" + pattern.replace('"', '""') + '"'
+        else:
+            # Shorter than one trigram, or no index: LIKE scan
+            where = " OR ".join(f"{columns[f]} LIKE :pattern ESCAPE '\\'" for f in fields)
+            escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params["pattern"] = f"%{escaped}%"
+        
+        query = text(
+            f"SELECT {columns['id']}, {columns['project']}, {columns['environment']}, {columns['key']} "
+            f"FROM {source} WHERE {where} ORDER BY 2, 3, 4 LIMIT :limit"
+        )
+        with self.db.engine.connect() as conn:
+            return list(map(SearchHit._make, conn.execute(query, params)))
+    
+    def _remember(self, project_name: str, env_name: str, env):
+        if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+            self._resolved.clear()
+        self._resolved[(project_name, env_name)] = env
     
     # Secret operations
     def add_secret(self, environment_id: int, key: str, value: str, expires_at=None) -> Secret:
+        return self.add_secrets(environment_id, [(key, value, expires_at)])[0]
+    
+    def add_secrets(self, environment_id: int, items) -> list:
+        """Add (key, value[, expires_at]) pairs or a {key: value} dict to one environment in a single commit"""
         if not self._unlocked:
             raise ValueError("Vault is locked")
-        encrypted_value = self.crypto.encrypt(value)
-        session = self.db.get_session()
-        try:
-            secret = Secret(environment_id=environment_id, key=key, encrypted_value=encrypted_value, expires_at=expires_at)
-            session.add(secret)
-            session.commit()
-            session.refresh(secret)
-            return secret
-        finally:
-            session.close()
+        items = list(items.items()) if isinstance(items, dict) else list(items)
+        with self.transaction() as session:
+            env_crypto = self._environment_crypto(environment_id)
+            secrets = []
+            for key, value, *rest in items:
+                secrets.append(Secret(
+                    environment_id=environment_id,
+                    key=key,
+                    encrypted_value=env_crypto.encrypt(value),
+                    expires_at=rest[0] if rest else None
+                ))
+            session.add_all(secrets)
+            try:
+                session.flush()
+            except IntegrityError:
+                raise ValueError(self._duplicate_message([key for key, *_ in items]))
+            return secrets
+    
+    def _duplicate_message(self, keys: list) -> str:
+        if len(keys) == 1:
+            return f"Secret '{keys[0]}' already exists"
+        return "One or more secrets already exist"
     
-    def get_secrets(self, environment_id: int) -> list:
+    def import_secrets(self, environment_id: int, items, on_conflict: str = "upsert") -> dict:
+        """Bulk-insert (key, value) pairs in one transaction; returns added/updated/skipped counts"""
+        if not self._unlocked:
+            raise ValueError("Vault is locked")
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(f"Unknown conflict policy '{on_conflict}'")
+        # Later occurrences of a key win, as when sourcing the files in order
+        values = dict(items)
+        with self.transaction() as session:
+            existing = dict(session.query(Secret.key, Secret.id).filter_by(environment_id=environment_id))
+            conflicts = [key for key in values if key in existing]
+            if conflicts and on_conflict == "fail":
+                shown = ", ".join(conflicts[:5]) + (", ..." if len(conflicts) > 5 else "")
+                raise ValueError(f"{len(conflicts)} secret(s) already exist: {shown}")
+            if on_conflict == "skip":
+                values = {key: value for key, value in values.items() if key not in existing}
+            keys = list(values)
+            encrypted = self._environment_crypto(environment_id).encrypt_batch(values.values())
+            rows = [{"environment_id": environment_id, "key": key, "encrypted_value": value}
+                    for key, value in zip(keys, encrypted)]
+            if rows:
+                stmt = sqlite_insert(Secret.__table__)
+                if on_conflict == "upsert":
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["environment_id", "key"],
+                        set_={"encrypted_value": stmt.excluded.encrypted_value}
+                    )
+                elif on_conflict == "skip":
+                    stmt = stmt.on_conflict_do_nothing(index_elements=["environment_id", "key"])
+                # A list of parameter sets runs as a single executemany
+                try:
+                    session.execute(stmt, rows)
+                except IntegrityError:
+                    raise ValueError("One or more secrets already exist")
+        if self.cache:
+            for key in conflicts:
+                self.cache.invalidate(existing[key])
+        updated = 0 if on_conflict == "skip" else len(conflicts)
+        return {
+            "added": len(rows) - updated,
+            "updated": updated,
+            "skipped": len(conflicts) - updated,
+        }
+    
+    def get_secrets(self, environment_id: int, keys: KeyFilter = None) -> list:
+        """Secrets of one environment as SecretRecords (Core query, no ORM instances)"""
+        query = select(*_columns(Secret, SecretRecord)).where(Secret.environment_id == environment_id)
+        if keys:
+            # OR'ed predicates may be served by several index lookups; keep output in key order
+            query = query.where(*keys.clauses()).order_by(Secret.key)
+        with self.db.engine.connect() as conn:
+            return list(map(SecretRecord._make, conn.execute(query)))
+    
+    def get_secrets_page(self, environment_id: int, after_key: str = None, limit: int = SECRETS_PAGE_SIZE) -> list:
+        """Up to limit SecretRecords ordered by key, starting after after_key
+        (keyset pagination: each page is a range scan of the (environment_id, key) index)"""
+        query = (select(*_columns(Secret, SecretRecord))
+                 .where(Secret.environment_id == environment_id)
+                 .order_by(Secret.key)
+                 .limit(limit))
+        if after_key is not None:
+            query = query.where(Secret.key > after_key)
+        with self.db.engine.connect() as conn:
+            return list(map(SecretRecord._make, conn.execute(query)))
+    
+    def iter_secret_pages(self, environment_id: int, batch_size: int = SECRETS_PAGE_SIZE):
+        """Yield an environment's secrets as lists of at most batch_size records, ordered by key"""
+        after_key = None
+        while True:
+            page = self.get_secrets_page(environment_id, after_key, batch_size)
+            if page:
+                yield page
+            if len(page) < batch_size:
+                return
+            after_key = page[-1].key
+    
+    def iter_secrets(self, environment_id: int, batch_size: int = SECRETS_PAGE_SIZE):
+        """Yield an environment's secrets one by one, holding at most batch_size in memory"""
+        for page in self.iter_secret_pages(environment_id, batch_size):
+            yield from page
+    
+    def decrypt_secret(self, secret) -> str:
+        """Decrypt one Secret row, served from the cache when enabled"""
+        if not self._unlocked:
+            raise ValueError("Vault is locked")
+        if self.cache:
+            value = self.cache.get(secret.id, secret.encrypted_value)
+            if value is None:
+                value = self._environment_crypto(secret.environment_id).decrypt(secret.encrypted_value)
+                self.cache.put(secret.id, secret.encrypted_value, value)
+            return value
+        return self._environment_crypto(secret.environment_id).decrypt(secret.encrypted_value)
+    
+    def decrypt_many(self, secrets: list) -> list:
+        """Decrypt Secret rows in parallel; failures are reported per item in the DecryptResults"""
+        if not self._unlocked:
+            raise ValueError("Vault is locked")
+        results = [None] * len(secrets)
+        missing = {}  # environment_id -> indexes still to decrypt
+        for i, secret in enumerate(secrets):
+            value = self.cache.get(secret.id, secret.encrypted_value) if self.cache else None
+            if value is None:
+                missing.setdefault(secret.environment_id, []).append(i)
+            else:
+                results[i] = DecryptResult(value)
+        for environment_id, indexes in missing.items():
+            env_crypto = self._environment_crypto(environment_id)
+            decrypted = env_crypto.decrypt_batch([secrets[i].encrypted_value for i in indexes])
+            for i, result in zip(indexes, decrypted):
+                results[i] = result
+                if result.ok and self.cache:
+                    self.cache.put(secrets[i].id, secrets[i].encrypted_value, result.value)
+        return results
+    
+    def iter_all_secrets(self, batch_size: int = EXPORT_BATCH_SIZE, keys: KeyFilter = None):
+        """Yield (project, env, key, DecryptResult) for every secret (selected by keys), ordered by
+        project/env/key, holding at most batch_size rows in memory"""
+        if not self._unlocked:
+            raise ValueError("Vault is locked")
         session = self.db.get_session()
         try:
-            return session.query(Secret).filter_by(environment_id=environment_id).all()
+            query = (select(Project.name.label('project'), Environment.name.label('environment'),
+                            Secret.environment_id, Secret.key, Secret.encrypted_value)
+                     .join(Environment, Environment.project_id == Project.id)
+                     .join(Secret, Secret.environment_id == Environment.id)
+                     .order_by(Project.name, Environment.name, Secret.key)
+                     .execution_options(yield_per=batch_size))
+            if keys:
+                query = query.where(*keys.clauses())
+            for rows in session.execute(query).partitions():
+                # Decrypt each environment's run of rows as one parallel batch
+                start = 0
+                while start < len(rows):
+                    environment_id = rows[start].environment_id
+                    end = start
+                    while end < len(rows) and rows[end].environment_id == environment_id:
+                        end += 1
+                    chunk = rows[start:end]
+                    results = self._environment_crypto(environment_id).decrypt_batch(
+                        [row.encrypted_value for row in chunk])
+                    for row, result in zip(chunk, results):
+                        yield row.project, row.environment, row.key, result
+                    start = end
         finally:
             session.close()
     
-    def decrypt_secret(self, encrypted_value: str) -> str:
-        if not self._unlocked:
-            raise ValueError("Vault is locked")
-        return self.crypto.decrypt(encrypted_value)
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the decrypt cache (None when disabled)"""
+        return self.cache.stats() if self.cache else None
     
     def update_secret(self, secret_id: int, key: str = None, value: str = None):
+        self.update_secrets([(secret_id, key, value)])
+    
+    def update_secrets(self, updates):
+        """Apply (secret_id, key, value) updates in a single commit; None leaves a field unchanged"""
         if not self._unlocked:
             raise ValueError("Vault is locked")
-        session = self.db.get_session()
-        try:
-            secret = session.query(Secret).filter_by(id=secret_id).first()
-            if secret:
+        updates = list(updates)
+        with self.transaction() as session:
+            ids = [secret_id for secret_id, _, _ in updates]
+            secrets = {}
+            for i in range(0, len(ids), ID_BATCH_SIZE):
+                for secret in session.query(Secret).filter(Secret.id.in_(ids[i:i + ID_BATCH_SIZE])):
+                    secrets[secret.id] = secret
+            for secret_id, key, value in updates:
+                secret = secrets.get(secret_id)
+                if secret is None:
+                    continue
                 if key:
                     secret.key = key
                 if value:
-                    secret.encrypted_value = self.crypto.encrypt(value)
-                session.commit()
-        finally:
-            session.close()
+                    secret.encrypted_value = self._environment_crypto(secret.environment_id).encrypt(value)
+                if self.cache:
+                    self.cache.invalidate(secret_id)
+            try:
+                session.flush()
+            except IntegrityError:
+                raise ValueError(self._duplicate_message([key for _, key, _ in updates if key]))
     
     def delete_secret(self, secret_id: int):
-        session = self.db.get_session()
-        try:
-            secret = session.query(Secret).filter_by(id=secret_id).first()
-            if secret:
-                session.delete(secret)
-                session.commit()
-        finally:
-            session.close()
+        self.delete_secrets([secret_id])
+    
+    def delete_secrets(self, secret_ids):
+        """Delete secrets by id with one statement"""
+        secret_ids = list(secret_ids)
+        with self.transaction() as session:
+            for i in range(0, len(secret_ids), ID_BATCH_SIZE):
+                batch = secret_ids[i:i + ID_BATCH_SIZE]
+                session.query(Secret).filter(Secret.id.in_(batch)).delete(synchronize_session=False)
+            if self.cache:
+                for secret_id in secret_ids:
+                    self.cache.invalidate(secret_id)